@@ -3,13 +3,18 @@ import subprocess
 import frontmatter
 import re
 import shutil
+import threading
 from datetime import datetime
 from canvasapi import Canvas
 from handlers.base_handler import BaseHandler
-from handlers.content_utils import process_content, safe_delete_file, safe_delete_dir, get_mapped_id, save_mapped_id, parse_module_name
+from handlers.content_utils import process_content, safe_delete_file, safe_delete_dir, get_mapped_id, save_mapped_id, parse_module_name, load_frontmatter_metadata, content_lock
 from handlers.drift_detector import check_drift, store_canvas_hash
 from handlers.log import logger
 
+# With --workers, several assignments can sync at once. Group set prompts read
+# stdin and may set the "apply to all" choice, so one runs at a time.
+_GROUP_SET_PROMPT_LOCK = threading.Lock()
+
 class AssignmentHandler(BaseHandler):
     _group_set_for_all = None  # Cached choice when user selects "all"
 
@@ -19,8 +24,7 @@ class AssignmentHandler(BaseHandler):
         if os.path.basename(file_path).startswith('_temp_'):
             return False
         try:
-            post = frontmatter.load(file_path)
-            canvas_meta = post.metadata.get('canvas', {})
+            canvas_meta = load_frontmatter_metadata(file_path).get('canvas', {})
             return canvas_meta.get('type') == 'assignment'
         except:
             return False
@@ -116,22 +120,23 @@ class AssignmentHandler(BaseHandler):
                 logger.debug("    Matched by cached ID: %s", assign_obj.id)
                 assign_obj.edit(assignment=assignment_args)
             else:
-                # Double check Title Search
-                assignments = course.get_assignments(search_term=title)
-                existing_item = None
-                for a in assignments:
-                    if a.name == title:
-                        existing_item = a
-                        break
-
-                if existing_item:
-                    logger.info("    [yellow]Updating assignment:[/yellow] %s", title)
-                    logger.debug("    Matched by title search (ID: %s)", existing_item.id)
-                    existing_item.edit(assignment=assignment_args)
-                    assign_obj = existing_item
-                else:
-                    logger.info("    [green]Creating assignment:[/green] %s", title)
-                    assign_obj = course.create_assignment(assignment=assignment_args)
+                # Double check Title Search (locked against a JIT stub for this file)
+                with content_lock(file_path):
+                    assignments = course.get_assignments(search_term=title)
+                    existing_item = None
+                    for a in assignments:
+                        if a.name == title:
+                            existing_item = a
+                            break
+
+                    if existing_item:
+                        logger.info("    [yellow]Updating assignment:[/yellow] %s", title)
+                        logger.debug("    Matched by title search (ID: %s)", existing_item.id)
+                        existing_item.edit(assignment=assignment_args)
+                        assign_obj = existing_item
+                    else:
+                        logger.info("    [green]Creating assignment:[/green] %s", title)
+                        assign_obj = course.create_assignment(assignment=assignment_args)
 
             # 4c. Update Sync Map and store content hash for drift detection
             if content_root:
@@ -166,6 +171,11 @@ class AssignmentHandler(BaseHandler):
 
         gc_by_name = {gc.name: gc for gc in group_categories}
 
+        with _GROUP_SET_PROMPT_LOCK:
+            return self._choose_group_set(file_path, post, group_categories, gc_by_name, group_set_name)
+
+    def _choose_group_set(self, file_path, post, group_categories, gc_by_name, group_set_name):
+        """Picks the group set for _resolve_group_set, prompting when needed."""
         # Case 1: group_set name is already specified — validate it
         if group_set_name:
             if group_set_name in gc_by_name:
@@ -1,9 +1,17 @@
 from abc import ABC, abstractmethod
 import os
+import mmap
+import atexit
+import functools
+import hashlib
+import shutil
+import tempfile
+import threading
 import subprocess
 import re
 import html as html_lib
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from handlers.content_utils import safe_delete_file, safe_delete_dir
 from handlers.config import load_config
 from handlers.log import logger
@@ -19,6 +27,125 @@ _DEFAULT_CALLOUT_STYLES = {
 
 _callout_cache = {}
 
+# The <div id="qchunk-KEY"> markers that batched question renders use to
+# split the output back into pieces.
+_RE_QCHUNK = re.compile(r'<div\s+id="qchunk-([^"]+)"[^>]*>\s*(.*?)\s*</div>', re.DOTALL)
+
+# A chunk that is already one line of block-level HTML, with none of the
+# characters Pandoc reads as markdown, LaTeX, smart quotes or citations,
+# renders to itself and can skip Quarto.
+_RE_RENDERED_HTML = re.compile(r'<(?:p|div|table|ul|ol|blockquote)[\s>][^\n$\\`*_~^\[\]{}#@\'"]*>')
+
+# Temp render files are deleted in the background so the next file can start
+# while the unlinks (and any lock retries) run. Drained at interpreter exit.
+_CLEANUP_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix='render-cleanup')
+atexit.register(_CLEANUP_POOL.shutdown, wait=True)
+
+# Rendered HTML of batched quiz documents, keyed by a hash of the document,
+# so re-syncing a quiz whose content is unchanged skips the Quarto run.
+RENDER_CACHE_DIR = '.sync_cache'
+RENDER_CACHE_MAX_ENTRIES = 200
+
+# Only the end of a failed render's stderr is logged; the error is at the
+# bottom and a chatty render can write megabytes before it.
+RENDER_ERROR_TAIL_BYTES = 4096
+
+# Project config Quarto merges into a render, and the file references in it
+# (CSS, filters, templates, ...) whose edits must invalidate cached renders.
+_QUARTO_CONFIG_FILES = ('_quarto.yml', '_quarto.yaml', '_metadata.yml', '_metadata.yaml')
+_RE_CONFIG_FILE_REF = re.compile(r'[\w./\\-]+\.(?:css|scss|lua|html|tex|csl|bib|ya?ml)\b')
+
+@functools.lru_cache(maxsize=None)
+def _quarto_version():
+    """`quarto --version`, or '' when Quarto can't be run. Asked once per process."""
+    try:
+        return subprocess.run(["quarto", "--version"], stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, text=True).stdout.strip()
+    except OSError:
+        return ''
+
+def _render_config_dirs(base_path, content_root):
+    """base_path and its parents up to content_root, or both when unrelated."""
+    directory = os.path.abspath(base_path)
+    root = os.path.abspath(content_root)
+    dirs = [directory]
+    while directory != root:
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            dirs.append(root)
+            break
+        directory = parent
+        dirs.append(directory)
+    return dirs
+
+def _render_config_fingerprint(base_path, content_root):
+    """
+    Everything outside the document that changes what Quarto renders for a
+    file in base_path: the contents of the project and directory config
+    files from base_path up to content_root, the mtime and size of files
+    they reference, and the Quarto version.
+    """
+    parts = [_quarto_version()]
+    for directory in _render_config_dirs(base_path, content_root):
+        for name in _QUARTO_CONFIG_FILES:
+            path = os.path.join(directory, name)
+            try:
+                with open(path, 'rb') as f:
+                    config = f.read()
+            except OSError:
+                continue
+            parts.append(f"{path}\0{hashlib.sha1(config).hexdigest()}")
+            for ref in _RE_CONFIG_FILE_REF.findall(config.decode('utf-8', errors='replace')):
+                try:
+                    st = os.stat(os.path.join(directory, ref))
+                except OSError:
+                    continue
+                parts.append(f"{ref}\0{st.st_mtime_ns}\0{st.st_size}")
+    return '\0'.join(parts)
+
+def _render_cache_path(content_root, base_path, qmd_content):
+    # The directory and its Quarto config are part of the key, so editing
+    # _quarto.yml or a stylesheet or filter it names re-renders
+    config = _render_config_fingerprint(base_path, content_root)
+    key = hashlib.sha1(f"{os.path.abspath(base_path)}\0{config}\0{qmd_content}".encode('utf-8')).hexdigest()
+    return os.path.join(content_root, RENDER_CACHE_DIR, f"render_{key}.html")
+
+def _render_cache_get(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        os.utime(path)  # recency for pruning
+        return html
+    except OSError:
+        return None
+
+def _render_cache_put(path, html):
+    cache_dir = os.path.dirname(path)
+    tmp_path = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(html)
+        os.replace(tmp_path, path)
+        tmp_path = None
+
+        # Keep the most recently used entries
+        entries = [e for e in os.scandir(cache_dir) if e.name.startswith('render_')]
+        if len(entries) > RENDER_CACHE_MAX_ENTRIES:
+            entries.sort(key=lambda e: e.stat().st_mtime)
+            for e in entries[:len(entries) - RENDER_CACHE_MAX_ENTRIES]:
+                os.remove(e.path)
+    except OSError as e:
+        logger.debug("    Could not update render cache: %s", e)
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def clear_render_cache(content_root):
+    """Removes all cached renders (used by --force)."""
+    shutil.rmtree(os.path.join(content_root, RENDER_CACHE_DIR), ignore_errors=True)
+
 def _load_callout_styles(content_root):
     """Parse callout styles from branding.css, with defaults as fallback."""
     if content_root in _callout_cache:
@@ -170,23 +297,218 @@ class BaseHandler(ABC):
         if files_dir:
             safe_delete_dir(files_dir)
 
+    def _cleanup_later(self, qmd_path, html_path, files_dir):
+        """
+        Like _cleanup, but runs on the background cleanup pool. Only for temp
+        names unique to one source file; reused names (e.g. the quiz render)
+        must be cleaned synchronously so the next render cannot race the delete.
+        """
+        _CLEANUP_POOL.submit(self._cleanup, qmd_path, html_path, files_dir)
+
+    @staticmethod
+    def _main_span(buf):
+        """
+        (start, end) of the <main id="quarto-document-content"> body in an
+        HTML bytes buffer (bytes or mmap), or None. A linear find scan like
+        _strip_title_block.
+        """
+        start = buf.find(b'<main')
+        while start != -1:
+            tag_end = buf.find(b'>', start)
+            if tag_end == -1:
+                break
+            if b'id="quarto-document-content"' in buf[start:tag_end]:
+                close = buf.find(b'</main>', tag_end)
+                if close == -1:
+                    break
+                return tag_end + 1, close
+            start = buf.find(b'<main', tag_end)
+        return None
+
+    @classmethod
+    def _read_main_html(cls, html_path):
+        """
+        Reads the <main> body of a rendered page, or the whole page if it has
+        none. The file is mapped rather than read, so only the body is copied.
+        """
+        with open(html_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ''
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                span = cls._main_span(mm)
+                raw = mm[span[0]:span[1]] if span else mm[:]
+        html = raw.decode('utf-8')
+        # Same newlines as reading the file in text mode
+        if '\r' in html:
+            html = html.replace('\r\n', '\n').replace('\r', '\n')
+        return html
+
+    @staticmethod
+    def _build_chunk_document(chunks):
+        """
+        Joins (key, markdown) pairs into one QMD document, each piece wrapped in
+        a qchunk-KEY div that _split_rendered_chunks() finds after rendering.
+        """
+        return '---\ntitle: ""\n---\n' + ''.join(
+            f'\n\n::: {{#qchunk-{key}}}\n{text}\n:::\n' for key, text in chunks
+        )
+
+    @staticmethod
+    def _split_rendered_chunks(html_body):
+        """Maps each qchunk-KEY marker div in a batched render to its inner HTML."""
+        chunks = {}
+        for match in _RE_QCHUNK.finditer(html_body):
+            chunks.setdefault(match.group(1), match.group(2).strip())
+        return chunks
+
+    @staticmethod
+    def _needs_render(text):
+        """False for a chunk that Quarto would hand back unchanged (plain block HTML)."""
+        text = text.strip()
+        return not _RE_RENDERED_HTML.fullmatch(text) or '--' in text or '...' in text
+
+    @staticmethod
+    def _strip_title_block(html):
+        """
+        Removes Quarto's <header id="title-block-header">...</header> block(s).
+        A plain str.find scan, so it stays linear even on malformed HTML that
+        never closes the header.
+        """
+        parts = []
+        pos = 0
+        start = html.find('<header')
+        while start != -1:
+            tag_end = html.find('>', start)
+            if tag_end == -1:
+                break
+            if 'id="title-block-header"' not in html[start:tag_end]:
+                start = html.find('<header', tag_end)
+                continue
+            close = html.find('</header>', tag_end)
+            if close == -1:
+                break
+            parts.append(html[pos:start])
+            pos = close + len('</header>')
+            start = html.find('<header', pos)
+
+        if not parts:
+            return html
+        parts.append(html[pos:])
+        return ''.join(parts)
+
+    def _render_chunk_document(self, qmd_content, base_path, content_root=None):
+        """
+        Renders a batched chunk document (quiz questions) and returns its HTML
+        body, or None if Quarto produced no output. Quarto errors propagate.
+        With a content_root, results are cached in RENDER_CACHE_DIR.
+        """
+        cache_path = _render_cache_path(content_root, base_path, qmd_content) if content_root else None
+        if cache_path:
+            cached = _render_cache_get(cache_path)
+            if cached is not None:
+                logger.debug("    Using cached render")
+                return cached
+
+        # Per-thread name: quizzes in one folder may render at the same time
+        temp_stem = f"_temp_quiz_render_{threading.get_ident()}"
+        temp_qmd, temp_html, temp_files_dir = self._temp_render_paths(base_path, temp_stem)
+        try:
+            with open(temp_qmd, 'w', encoding='utf-8') as f:
+                f.write(qmd_content)
+
+            self._run_quarto(temp_qmd, "html")
+
+            if not os.path.exists(temp_html):
+                return None
+            # Extract main content
+            html_body = self._strip_title_block(self._read_main_html(temp_html))
+        finally:
+            self._cleanup(temp_qmd, temp_html, temp_files_dir)
+
+        if cache_path:
+            _render_cache_put(cache_path, html_body)
+        return html_body
+
+    @staticmethod
+    def _apply_rendered_chunks(questions_data, rendered_map):
+        """
+        Puts rendered chunks (keys q{i}_text, q{i}_a{j}, q{i}_correct_comments,
+        q{i}_incorrect_comments) back into the questions. Dicts are copied
+        only where something changes; the inputs are never modified.
+        """
+        rendered_questions = []
+        for qi, q in enumerate(questions_data):
+            changes = {}
+
+            text_key = f"q{qi}_text"
+            if text_key in rendered_map and rendered_map[text_key] != q.get('question_text'):
+                changes['question_text'] = rendered_map[text_key]
+
+            answers = q.get('answers')
+            if answers:
+                rendered_answers = None
+                for ai, ans in enumerate(answers):
+                    html = rendered_map.get(f"q{qi}_a{ai}")
+                    # Use the HTML version instead of answer_text
+                    if html is None or (ans.get('answer_html') == html and 'answer_text' not in ans):
+                        continue
+                    if rendered_answers is None:
+                        rendered_answers = list(answers)
+                    ans = dict(ans, answer_html=html)
+                    ans.pop('answer_text', None)
+                    rendered_answers[ai] = ans
+                if rendered_answers is not None:
+                    changes['answers'] = rendered_answers
+
+            for comment_key in ('correct_comments', 'incorrect_comments'):
+                ck = f"q{qi}_{comment_key}"
+                if ck in rendered_map and rendered_map[ck] != q.get(comment_key):
+                    changes[comment_key] = rendered_map[ck]
+
+            rendered_questions.append(dict(q, **changes) if changes else q)
+
+        return rendered_questions
+
+    @staticmethod
+    def _temp_render_paths(base_path, temp_stem):
+        """Returns the (qmd, html, files_dir) paths Quarto uses for a temp render."""
+        base = os.path.join(base_path, temp_stem)
+        return f"{base}.qmd", f"{base}.html", f"{base}_files"
+
+    @staticmethod
+    def _run_quarto(qmd_path, to):
+        """
+        Runs `quarto render` on a file. Quarto's progress output on stdout is
+        discarded; stderr is captured so a failure can be reported.
+        """
+        cmd = ["quarto", "render", qmd_path, "--to", to]
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    @staticmethod
+    def _render_error(e):
+        """
+        Returns the last RENDER_ERROR_TAIL_BYTES of Quarto's stderr for a
+        failed render, or the exception itself.
+        """
+        if isinstance(e, subprocess.CalledProcessError) and e.stderr:
+            tail = e.stderr[-RENDER_ERROR_TAIL_BYTES:].decode('utf-8', errors='replace').strip()
+            return tail if len(e.stderr) <= RENDER_ERROR_TAIL_BYTES else f"...{tail}"
+        return e
+
     def render_quarto_pdf(self, processed_content, base_path, filename):
         """
         Renders a processed QMD document to PDF via Quarto.
         Returns the path to the rendered PDF file, or None on failure.
         The caller is responsible for deleting the PDF after use.
         """
-        temp_qmd = os.path.join(base_path, f"tmp-pdf-{filename}")
-        temp_stem = os.path.splitext(f"tmp-pdf-{filename}")[0]
-        temp_files_dir = os.path.join(base_path, f"{temp_stem}_files")
-        temp_pdf = os.path.join(base_path, f"{temp_stem}.pdf")
+        temp_qmd, _, temp_files_dir = self._temp_render_paths(base_path, f"tmp-pdf-{os.path.splitext(filename)[0]}")
+        temp_pdf = f"{temp_qmd[:-4]}.pdf"
 
         try:
             with open(temp_qmd, 'w', encoding='utf-8') as f:
                 f.write(processed_content)
 
-            cmd = ["quarto", "render", temp_qmd, "--to", "pdf"]
-            subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            self._run_quarto(temp_qmd, "pdf")
 
             if not os.path.exists(temp_pdf):
                 logger.error("    Expected PDF output from Quarto render but file not found")
@@ -202,7 +524,7 @@ class BaseHandler(ABC):
             if 'no such file' in stderr_text.lower() and ('latex' in stderr_text.lower() or 'tinytex' in stderr_text.lower()):
                 logger.error("    PDF render failed: LaTeX not found. Install with: quarto install tinytex")
             else:
-                logger.error("    PDF render failed: %s", stderr_text or e)
+                logger.error("    PDF render failed: %s", self._render_error(e))
             self._cleanup(temp_qmd, None, temp_files_dir)
             return None
         except Exception as e:
@@ -210,56 +532,56 @@ class BaseHandler(ABC):
             self._cleanup(temp_qmd, None, temp_files_dir)
             return None
 
-    def render_quarto_document(self, processed_content, base_path, filename, content_root=None):
+    def render_quarto_document(self, processed_content, base_path, filename, content_root=None, cache=False):
         """
         Renders a processed QMD document to HTML via Quarto.
         Extracts the <main> content block and cleans up temp files.
+        With cache=True (and a content_root), the extracted block is kept in
+        RENDER_CACHE_DIR so an unchanged document skips the Quarto run.
         """
-        temp_qmd = os.path.join(base_path, f"tmp-html-{filename}")
-        temp_stem = os.path.splitext(f"tmp-html-{filename}")[0]
-        temp_files_dir = os.path.join(base_path, f"{temp_stem}_files")
-        temp_html = None
+        cache_path = _render_cache_path(content_root, base_path, processed_content) if cache and content_root else None
+        html_body = _render_cache_get(cache_path) if cache_path else None
+        if html_body is not None:
+            logger.debug("    Using cached render")
+        else:
+            html_body = self._render_main_html(processed_content, base_path, filename)
+            if html_body is None:
+                return None
+            if cache_path:
+                _render_cache_put(cache_path, html_body)
+
+        # Inline styles for Canvas compatibility
+        callout_styles = _load_callout_styles(content_root) if content_root else _DEFAULT_CALLOUT_STYLES
+        html_body = self._inline_callout_styles(html_body, callout_styles)
+        html_body = self._inline_syntax_highlighting(html_body)
+        html_body = self._inline_math(html_body)
+        return html_body
+
+    def _render_main_html(self, processed_content, base_path, filename):
+        """Quarto render of a document; returns its <main> block without the title block, or None."""
+        temp_qmd, temp_html, temp_files_dir = self._temp_render_paths(base_path, f"tmp-html-{os.path.splitext(filename)[0]}")
 
         try:
             with open(temp_qmd, 'w', encoding='utf-8') as f:
                 f.write(processed_content)
 
-            cmd = ["quarto", "render", temp_qmd, "--to", "html"]
-            subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-            temp_html = temp_qmd.replace('.qmd', '.html')
+            self._run_quarto(temp_qmd, "html")
 
             if not os.path.exists(temp_html):
                  logger.error("    Expected HTML output from Quarto render but file not found")
-                 self._cleanup(temp_qmd, None, temp_files_dir)
+                 self._cleanup_later(temp_qmd, None, temp_files_dir)
                  return None
 
-            with open(temp_html, 'r', encoding='utf-8') as f:
-                full_html = f.read()
-
             # Extract Content
-            main_match = re.search(r'<main[^>]*id="quarto-document-content"[^>]*>(.*?)</main>', full_html, re.DOTALL)
-
-            if main_match:
-                html_body = main_match.group(1)
-                html_body = re.sub(r'<header[^>]*id="title-block-header"[^>]*>.*?</header>', '', html_body, flags=re.DOTALL)
-            else:
-                html_body = full_html
-                html_body = re.sub(r'<header[^>]*id="title-block-header"[^>]*>.*?</header>', '', html_body, flags=re.DOTALL)
-
-            # Inline styles for Canvas compatibility
-            callout_styles = _load_callout_styles(content_root) if content_root else _DEFAULT_CALLOUT_STYLES
-            html_body = self._inline_callout_styles(html_body, callout_styles)
-            html_body = self._inline_syntax_highlighting(html_body)
-            html_body = self._inline_math(html_body)
+            html_body = self._strip_title_block(self._read_main_html(temp_html))
 
             # Cleanup
-            self._cleanup(temp_qmd, temp_html, temp_files_dir)
+            self._cleanup_later(temp_qmd, temp_html, temp_files_dir)
             return html_body
 
         except Exception as e:
-            logger.error("    Quarto render failed: %s", e)
-            self._cleanup(temp_qmd, None, temp_files_dir)
+            logger.error("    Quarto render failed: %s", self._render_error(e))
+            self._cleanup_later(temp_qmd, temp_html, temp_files_dir)
             return None
 
     @staticmethod
@@ -3,18 +3,111 @@ import re
 import frontmatter
 import json
 import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from canvasapi import Canvas
+from canvasapi.exceptions import Forbidden, RateLimitExceeded
 from handlers.log import logger
 
+# orjson serializes the sync map several times faster when installed. The
+# stdlib fallback is set up to write byte-for-byte the same file.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Global cache for folder names to IDs to avoid redundant API lookups
 FOLDER_CACHE = {}
 
+# {path: (mtime_ns, size, metadata)} — frontmatter parsed by load_frontmatter_metadata()
+FRONTMATTER_CACHE = {}
+
+# Concurrent process_content() calls for one document's chunks
+CONTENT_WORKERS = 8
+
+# process_content() may run on several threads (process_content_many), so
+# find-or-create steps are serialized per target: one lock per key.
+_KEY_LOCKS = {}
+_KEY_LOCKS_GUARD = threading.Lock()
+
+# Read-modify-write of the sync map file when no SyncMap batch is open
+_SYNC_MAP_LOCK = threading.RLock()
+
+def _key_lock(key):
+    with _KEY_LOCKS_GUARD:
+        lock = _KEY_LOCKS.get(key)
+        if lock is None:
+            lock = _KEY_LOCKS[key] = threading.Lock()
+        return lock
+
+def content_lock(file_path):
+    """
+    Lock for finding or creating the Canvas object of a local file. Held by
+    the file's own sync and by JIT stubs for links to it, so with --workers
+    the two can't both miss the title lookup and create duplicates. Not
+    reentrant: don't process content while holding it.
+    """
+    return _key_lock(('link', os.path.abspath(file_path)))
+
+class TitleIndex:
+    """
+    Canvas objects of one kind (pages, quizzes, modules) by course and title,
+    for find-or-create lookups. The first lookup per course lists them all
+    once; later lookups are dict hits. Misses fall back to a title search,
+    since objects can be created after the listing (e.g. JIT stubs from
+    cross-links).
+
+    `list_items(course, **params)` lists them with canvasapi's get_* params
+    (per_page, search_term); `title_attr` names their title attribute.
+    """
+
+    def __init__(self, list_items, title_attr='title'):
+        self._list_items = list_items
+        self._title_attr = title_attr
+        self._by_course = {}
+        # Files synced in parallel (--workers) share one listing
+        self._lock = threading.Lock()
+
+    def find(self, course, title):
+        """Return the object with exactly this title, or None."""
+        with self._lock:
+            index = self._by_course.get(course.id)
+            if index is None:
+                index = {}
+                for obj in self._list_items(course, per_page=100):
+                    index.setdefault(getattr(obj, self._title_attr), obj)
+                self._by_course[course.id] = index
+
+        found = index.get(title)
+        if found is None:
+            for obj in self._list_items(course, search_term=title):
+                if getattr(obj, self._title_attr) == title:
+                    found = index[title] = obj
+                    break
+        return found
+
+    def remember(self, course, obj):
+        """Add a newly created object to the course's index (if built)."""
+        index = self._by_course.get(course.id)
+        if index is not None:
+            index[getattr(obj, self._title_attr)] = obj
+
+    def clear(self):
+        with self._lock:
+            self._by_course.clear()
+
+# NN_ ordering prefix of module folders and content files; checked for every
+# directory entry during a sync
+_RE_NN_PREFIX = re.compile(r'^\d{2}_')
+_RE_NN_NAME = re.compile(r'^(\d{2})_(.*)')
+
 def is_valid_name(name):
     """
     Checks if the name starts with exactly two digits followed by an underscore.
     Example: '01_Intro' -> True, 'Intro' -> False, '1_Intro' -> False
     """
-    return bool(re.match(r'^\d{2}_', name))
+    return _RE_NN_PREFIX.match(name) is not None
 
 def parse_module_name(text):
     """
@@ -23,7 +116,7 @@ def parse_module_name(text):
     """
     if not text:
         return text
-    match = re.match(r'^(\d{2})_(.*)', text)
+    match = _RE_NN_NAME.match(text)
     if match:
         return match.group(2)
     return text
@@ -55,6 +148,53 @@ def expected_canvas_title(file_path):
     # Solo asset (PDF, ZIP, etc.) — module item keeps the extension
     return parse_module_name(filename)
 
+def load_frontmatter_metadata(file_path):
+    """
+    Returns a file's YAML frontmatter as a dict ({} when it has none or it
+    cannot be read or parsed). Parsed once per file version, so the handlers'
+    can_handle() checks down the dispatch chain share one parse.
+    """
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return {}
+    hit = FRONTMATTER_CACHE.get(file_path)
+    if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2]
+
+    try:
+        metadata = frontmatter.load(file_path).metadata
+    except Exception:
+        metadata = {}
+    FRONTMATTER_CACHE[file_path] = (st.st_mtime_ns, st.st_size, metadata)
+    return metadata
+
+def frontmatter_may_contain(file_path, needle, head_size=2048):
+    """
+    Cheap pre-check that lets can_handle() skip a full frontmatter parse.
+
+    Reads only the first `head_size` bytes. Returns False when the file's YAML
+    frontmatter block ends inside that head and does not contain `needle`
+    (bytes), i.e. when a full parse could not possibly match. Returns True in
+    every other case, meaning the caller must parse to decide.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(head_size)
+    except OSError:
+        return True
+
+    block = head.lstrip()
+    if not block.startswith(b'---'):
+        return True
+
+    # Closing boundary: the next line made only of dashes
+    close = re.search(rb'\n-{3,}[ \t\r]*(?:\n|$)', block[3:])
+    if close is None:
+        # Unterminated frontmatter only matters if we haven't seen the whole file
+        return len(head) == head_size
+    return needle in block[:close.start() + 3]
+
 def clean_title(filename):
     """
     Removes NN_ prefix and file extension.
@@ -80,6 +220,14 @@ def get_or_create_folder(course, folder_path, parent_folder_id=None):
     if cache_key in FOLDER_CACHE:
         return FOLDER_CACHE[cache_key]
 
+    with _key_lock(('folder', cache_key)):
+        return _get_or_create_folder(course, folder_path, cache_key, parent_folder_id)
+
+def _get_or_create_folder(course, folder_path, cache_key, parent_folder_id):
+    # Another thread may have created it while we waited
+    if cache_key in FOLDER_CACHE:
+        return FOLDER_CACHE[cache_key]
+
     # 2. Fetch all folders and populate cache if empty
     logger.debug("    Checking for folder: %s", folder_path)
     folders = course.get_folders()
@@ -114,6 +262,12 @@ def upload_file(course, local_path, target_folder_name="course_files", content_r
         logger.error("    File not found: %s", local_path)
         return local_path, None
 
+    # Same file referenced twice in one document: the second caller waits and
+    # then finds the first upload in the sync map
+    with _key_lock(('upload', os.path.abspath(local_path))):
+        return _upload_file(course, local_path, target_folder_name, content_root)
+
+def _upload_file(course, local_path, target_folder_name, content_root):
     filename = os.path.basename(local_path)
 
     # Smart Upload Logic: Check Sync Map for mtime match
@@ -147,14 +301,15 @@ def upload_file(course, local_path, target_folder_name="course_files", content_r
 
             # Update Sync Map
             if content_root:
-                sync_map = load_sync_map(content_root)
-                rel_path = os.path.relpath(local_path, content_root).replace('\\', '/')
-                sync_map[rel_path] = {
-                    'mtime': mtime,
-                    'url': file_url,
-                    'id': file_id
-                }
-                save_sync_map(content_root, sync_map)
+                with _SYNC_MAP_LOCK:
+                    sync_map = load_sync_map(content_root)
+                    rel_path = os.path.relpath(local_path, content_root).replace('\\', '/')
+                    sync_map[rel_path] = {
+                        'mtime': mtime,
+                        'url': file_url,
+                        'id': file_id
+                    }
+                    save_sync_map(content_root, sync_map)
 
             return file_url, file_id
         else:
@@ -224,7 +379,12 @@ def resolve_cross_link(course, current_file_path, link_target, base_path):
         logger.error("    Failed to parse target %s: %s", filename, e)
         return link_target
 
-    # 3. Find or Create Stub in Canvas
+    # 3. Find or Create Stub in Canvas (one thread per target, so concurrent
+    # chunks linking to the same file, or its own sync, don't create two)
+    with content_lock(abs_target_path):
+        return _find_or_create_stub(course, link_target, target_type, target_title)
+
+def _find_or_create_stub(course, link_target, target_type, target_title):
     canvas_url = link_target # Fallback
 
     if target_type == 'page':
@@ -417,9 +577,44 @@ def process_content(content, base_path, course, content_root=None):
 
     return content
 
+def process_content_many(chunks, base_path, course, content_root=None):
+    """
+    process_content() for a list of (key, text) pieces of one document, run
+    concurrently since each may upload images or resolve links over the
+    network. Returns {key: processed_text} in the order of `chunks`.
+    """
+    if len(chunks) < 2:
+        return {key: process_content(text, base_path, course, content_root=content_root)
+                for key, text in chunks}
+    with ThreadPoolExecutor(max_workers=min(CONTENT_WORKERS, len(chunks))) as pool:
+        results = pool.map(
+            lambda chunk: process_content(chunk[1], base_path, course, content_root=content_root),
+            chunks,
+        )
+        return {key: result for (key, _), result in zip(chunks, results)}
+
 import time
 import shutil
 
+def canvas_retry(func, *args, retries=4, delay=1.0, **kwargs):
+    """
+    Calls a Canvas API method, retrying with exponential backoff when Canvas
+    throttles the request. Canvas reports throttling as HTTP 403 with a
+    "Rate Limit Exceeded" body (canvasapi also maps a 429 to RateLimitExceeded).
+    Used where requests are sent concurrently.
+    """
+    for i in range(retries):
+        try:
+            return func(*args, **kwargs)
+        except Forbidden as e:  # RateLimitExceeded is a Forbidden subclass
+            if not isinstance(e, RateLimitExceeded) and 'Rate Limit Exceeded' not in str(e):
+                raise
+            if i == retries - 1:
+                raise
+            wait = delay * (2 ** i)
+            logger.debug("    Rate limited by Canvas, retrying in %.1fs (%d/%d)...", wait, i + 1, retries - 1)
+            time.sleep(wait)
+
 def safe_delete_file(path, retries=5, delay=0.5):
     """
     Attempts to delete a file multiple times if it's locked by another process.
@@ -469,7 +664,74 @@ def safe_delete_dir(path, retries=5, delay=0.5):
 def get_sync_map_path(content_root):
     return os.path.join(content_root, ".canvas_sync_map.json")
 
-def load_sync_map(content_root):
+# Sync maps held in memory by an open SyncMap, keyed by content_root
+_OPEN_SYNC_MAPS = {}
+
+class SyncMap:
+    """
+    Batches sync-map updates for a whole run.
+
+    While the block is open, load_sync_map()/save_sync_map() (and therefore
+    get_mapped_id()/save_mapped_id()) work against one in-memory dict instead
+    of re-reading and rewriting .canvas_sync_map.json for every file. The map
+    is written once, atomically, when the block exits - also on error, so
+    progress made before a failure is kept.
+
+        with SyncMap(content_root):
+            ...  # handlers call get_mapped_id / save_mapped_id as usual
+
+    Nested blocks for the same content_root join the outer one.
+    """
+    def __init__(self, content_root):
+        self.content_root = content_root
+        self.data = None
+        self.dirty = False
+        self._owner = False
+
+    def __enter__(self):
+        outer = _OPEN_SYNC_MAPS.get(self.content_root)
+        if outer is not None:
+            return outer
+        self.data = _read_sync_map(self.content_root)
+        _OPEN_SYNC_MAPS[self.content_root] = self
+        self._owner = True
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._owner:
+            _OPEN_SYNC_MAPS.pop(self.content_root, None)
+            self._owner = False
+            if self.dirty:
+                self.save()
+        return False
+
+    def get(self, file_path):
+        return self.data.get(_sync_map_key(self.content_root, file_path))
+
+    def set(self, file_path, canvas_id, mtime=None, **extra):
+        self.data[_sync_map_key(self.content_root, file_path)] = _sync_map_entry(canvas_id, mtime, extra)
+        self.dirty = True
+
+    def save(self):
+        _write_sync_map(self.content_root, self.data)
+        self.dirty = False
+
+
+def _sync_map_key(content_root, file_path):
+    return os.path.relpath(file_path, content_root).replace('\\', '/')
+
+def _sync_map_entry(canvas_id, mtime, extra=None):
+    if mtime is not None or extra:
+        entry = {'id': canvas_id}
+        if mtime is not None:
+            entry['mtime'] = mtime
+        if extra:
+            entry.update(extra)
+        return entry
+    # Backward compatibility / simple ID
+    return canvas_id
+
+def _read_sync_map(content_root):
     path = get_sync_map_path(content_root)
     if os.path.exists(path):
         try:
@@ -479,44 +741,66 @@ def load_sync_map(content_root):
             logger.error("    Failed to load sync map: %s", e)
     return {}
 
-def save_sync_map(content_root, sync_map):
+def _dump_sync_map(sync_map):
+    """Serializes the sync map to UTF-8 JSON, keys sorted so diffs stay stable."""
+    if orjson is not None:
+        return orjson.dumps(sync_map, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+    return json.dumps(sync_map, indent=2, sort_keys=True, ensure_ascii=False).encode('utf-8')
+
+def _write_sync_map(content_root, sync_map):
+    """Writes to a temp file next to the map, then renames it into place."""
     path = get_sync_map_path(content_root)
+    tmp_path = None
     try:
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(sync_map, f, indent=4)
+        fd, tmp_path = tempfile.mkstemp(dir=content_root, prefix='.canvas_sync_map.', suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_dump_sync_map(sync_map))
+        os.replace(tmp_path, path)
     except Exception as e:
         logger.error("    Failed to save sync map: %s", e)
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def load_sync_map(content_root):
+    batch = _OPEN_SYNC_MAPS.get(content_root)
+    if batch is not None:
+        return batch.data
+    return _read_sync_map(content_root)
+
+def save_sync_map(content_root, sync_map):
+    batch = _OPEN_SYNC_MAPS.get(content_root)
+    if batch is not None:
+        batch.data = sync_map
+        batch.dirty = True
+        return
+    _write_sync_map(content_root, sync_map)
 
 def get_mapped_id(content_root, file_path):
     """
     Returns the Canvas ID for a local file path.
     Also returns metadata if available (e.g. mtime).
     """
-    rel_path = os.path.relpath(file_path, content_root).replace('\\', '/')
-    sync_map = load_sync_map(content_root)
-    entry = sync_map.get(rel_path)
+    entry = load_sync_map(content_root).get(_sync_map_key(content_root, file_path))
 
     if isinstance(entry, dict):
         return entry.get('id'), entry
     return entry, None
 
-def save_mapped_id(content_root, file_path, canvas_id, mtime=None):
+def save_mapped_id(content_root, file_path, canvas_id, mtime=None, **extra):
     """
     Saves the Canvas ID and optionally the mtime for a local file path.
+    Extra keyword fields (e.g. questions_hash) are stored in the same entry.
+    Inside a SyncMap block this only updates memory; the file is written on exit.
     """
-    rel_path = os.path.relpath(file_path, content_root).replace('\\', '/')
-    sync_map = load_sync_map(content_root)
-
-    if mtime is not None:
-        sync_map[rel_path] = {
-            'id': canvas_id,
-            'mtime': mtime
-        }
-    else:
-        # Backward compatibility / simple ID
-        sync_map[rel_path] = canvas_id
+    batch = _OPEN_SYNC_MAPS.get(content_root)
+    if batch is not None:
+        batch.set(file_path, canvas_id, mtime=mtime, **extra)
+        return
 
-    save_sync_map(content_root, sync_map)
+    with _SYNC_MAP_LOCK:
+        sync_map = load_sync_map(content_root)
+        sync_map[_sync_map_key(content_root, file_path)] = _sync_map_entry(canvas_id, mtime, extra)
+        save_sync_map(content_root, sync_map)
 
 def prune_orphaned_assets(course):
     """
@@ -1,7 +1,7 @@
 import frontmatter
 import os
 from handlers.base_handler import BaseHandler
-from handlers.content_utils import parse_module_name
+from handlers.content_utils import parse_module_name, load_frontmatter_metadata
 from handlers.log import logger
 
 class ExternalLinkHandler(BaseHandler):
@@ -10,8 +10,7 @@ class ExternalLinkHandler(BaseHandler):
             return False
 
         try:
-            post = frontmatter.load(file_path)
-            canvas_meta = post.metadata.get('canvas', {})
+            canvas_meta = load_frontmatter_metadata(file_path).get('canvas', {})
             return canvas_meta.get('type') == 'external_url'
         except:
             return False
@@ -11,8 +11,13 @@ class NewQuizAPIClient:
     """
     A lightweight REST client for Canvas New Quizzes API.
     Uses the /api/quiz/v1/ base path which is completely separate from Classic Quizzes.
+
+    All clients share one requests.Session, so a sync that creates a client per
+    quiz still reuses the same keep-alive connections to Canvas.
     """
-    
+
+    _session = None
+
     def __init__(self, api_url, api_token):
         # Ensure base URL doesn't have trailing slash
         self.base_url = api_url.rstrip('/')
@@ -21,12 +26,15 @@ class NewQuizAPIClient:
             'Content-Type': 'application/json',
             'Accept': 'application/json'
         }
+        if NewQuizAPIClient._session is None:
+            NewQuizAPIClient._session = requests.Session()
+        self.session = NewQuizAPIClient._session
 
     def _request(self, method, endpoint, **kwargs):
         """Helper to make API requests and handle errors."""
         url = f"{self.base_url}{endpoint}"
         try:
-            response = requests.request(method, url, headers=self.headers, **kwargs)
+            response = self.session.request(method, url, headers=self.headers, **kwargs)
             response.raise_for_status()
             
             # Delete requests usually return 204 No Content
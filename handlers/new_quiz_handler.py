@@ -1,16 +1,17 @@
 import os
 import json
 import uuid
-import subprocess
 import re
 
-import frontmatter
 from handlers.base_handler import BaseHandler
-from handlers.content_utils import get_mapped_id, save_mapped_id, parse_module_name, load_sync_map, save_sync_map, process_content
+from handlers.content_utils import get_mapped_id, save_mapped_id, parse_module_name, load_sync_map, save_sync_map, process_content, process_content_many, load_frontmatter_metadata, content_lock
 from handlers.qmd_quiz_parser import parse_qmd_quiz
 from handlers.new_quiz_api import NewQuizAPIClient, NewQuizAPIError
 from handlers.log import logger
 
+# Formula variables are protected as QVAR_START_name_QVAR_END through Quarto
+_RE_QVAR = re.compile(r'QVAR_START_([a-zA-Z0-9_-]+)_QVAR_END')
+
 class NewQuizHandler(BaseHandler):
     """
     Handler for Canvas New Quizzes (assignment-backed).
@@ -19,14 +20,13 @@ class NewQuizHandler(BaseHandler):
     def can_handle(self, file_path: str) -> bool:
         if file_path.endswith('.qmd'):
             try:
-                post = frontmatter.load(file_path)
-                return post.metadata.get('canvas', {}).get('type') == 'new_quiz'
+                return load_frontmatter_metadata(file_path).get('canvas', {}).get('type') == 'new_quiz'
             except:
                 pass
         elif file_path.endswith('.json'):
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                with open(file_path, 'rb') as f:
+                    data = json.loads(f.read())
                 return data.get('canvas', {}).get('quiz_engine') == 'new'
             except:
                 pass
@@ -56,8 +56,8 @@ class NewQuizHandler(BaseHandler):
                 return
         else:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                with open(file_path, 'rb') as f:
+                    data = json.loads(f.read())
                 questions_data = data.get('questions', [])
                 canvas_meta = data.get('canvas', {})
             except Exception as e:
@@ -114,24 +114,26 @@ class NewQuizHandler(BaseHandler):
                     logger.info("    [yellow]Updating new quiz:[/yellow] %s", title)
                     quiz_obj = client.update_quiz(course_id, existing_id, quiz_payload)
                 else:
-                    # Fallback title search to adopt stubs
-                    assignments = course.get_assignments(search_term=title)
-                    stub_assignment = None
-                    for a in assignments:
-                        if a.name == title:
-                            stub_assignment = a
-                            break
-
-                    if stub_assignment:
-                        existing_id = str(stub_assignment.id)
-                        logger.info("    [yellow]Adopting existing stub:[/yellow] %s", title)
-                        self._update_backing_assignment(course, existing_id, canvas_meta)
-                        quiz_obj = client.update_quiz(course_id, existing_id, quiz_payload)
-                    else:
-                        logger.info("    [green]Creating new quiz:[/green] %s", title)
-                        quiz_obj = client.create_quiz(course_id, quiz_payload)
-                        existing_id = str(quiz_obj['id'])
-                        self._update_backing_assignment(course, existing_id, canvas_meta)
+                    # Fallback title search to adopt stubs (locked so a stub for
+                    # this file can't be created between the search and the create)
+                    with content_lock(file_path):
+                        assignments = course.get_assignments(search_term=title)
+                        stub_assignment = None
+                        for a in assignments:
+                            if a.name == title:
+                                stub_assignment = a
+                                break
+
+                        if stub_assignment:
+                            existing_id = str(stub_assignment.id)
+                            logger.info("    [yellow]Adopting existing stub:[/yellow] %s", title)
+                            self._update_backing_assignment(course, existing_id, canvas_meta)
+                            quiz_obj = client.update_quiz(course_id, existing_id, quiz_payload)
+                        else:
+                            logger.info("    [green]Creating new quiz:[/green] %s", title)
+                            quiz_obj = client.create_quiz(course_id, quiz_payload)
+                            existing_id = str(quiz_obj['id'])
+                            self._update_backing_assignment(course, existing_id, canvas_meta)
 
                     map_entry = None  # Clear stale item IDs — new quiz has no items yet
 
@@ -348,99 +350,38 @@ class NewQuizHandler(BaseHandler):
         logger.debug("    Rendering %d questions through Quarto...", len(questions_data))
 
         # Step 2: Process images/links in all chunks
-        processed_chunks = {}
-        for key, md_text in chunks:
-            processed_chunks[key] = process_content(
-                md_text, base_path, course, content_root=content_root
-            )
+        processed_chunks = process_content_many(chunks, base_path, course, content_root=content_root)
 
-        # Step 3: Combine into a single QMD document with div markers
-        qmd_parts = ["---\ntitle: \"\"\n---\n"]
-        chunk_keys = list(processed_chunks.keys())
+        # Step 3: Combine the chunks Quarto would change into a single QMD document with div markers
+        chunk_keys = [key for key, text in processed_chunks.items() if self._needs_render(text)]
+        if not chunk_keys:
+            logger.debug("    Question content is already HTML, skipping Quarto")
+            return self._apply_rendered_chunks(questions_data, processed_chunks)
 
-        for key in chunk_keys:
-            qmd_parts.append(f'\n\n::: {{#qchunk-{key}}}\n{processed_chunks[key]}\n:::\n')
+        qmd_content = self._build_chunk_document((key, processed_chunks[key]) for key in chunk_keys)
 
-        qmd_content = ''.join(qmd_parts)
-
-        # Step 4: Single Quarto render
-        temp_qmd = os.path.join(base_path, "_temp_quiz_render.qmd")
-        temp_html = os.path.join(base_path, "_temp_quiz_render.html")
-        temp_files_dir = os.path.join(base_path, "_temp_quiz_render_files")
-
-        rendered_map = {}
+        # Step 4: Single Quarto render (or cached result)
+        rendered_map = dict(processed_chunks)
 
         try:
-            with open(temp_qmd, 'w', encoding='utf-8') as f:
-                f.write(qmd_content)
-
-            cmd = ["quarto", "render", temp_qmd, "--to", "html"]
-            subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-            if os.path.exists(temp_html):
-                with open(temp_html, 'r', encoding='utf-8') as f:
-                    full_html = f.read()
-
-                # Extract main content
-                main_match = re.search(
-                    r'<main[^>]*id="quarto-document-content"[^>]*>(.*?)</main>',
-                    full_html, re.DOTALL
-                )
-                html_body = main_match.group(1) if main_match else full_html
-                html_body = re.sub(
-                    r'<header[^>]*id="title-block-header"[^>]*>.*?</header>',
-                    '', html_body, flags=re.DOTALL
-                )
-
-                # Step 5: Split by div markers
-                for key in chunk_keys:
-                    pattern = rf'<div\s+id="qchunk-{re.escape(key)}"[^>]*>\s*(.*?)\s*</div>'
-                    match = re.search(pattern, html_body, re.DOTALL)
-                    if match:
-                        rendered_map[key] = match.group(1).strip()
-                    else:
-                        rendered_map[key] = processed_chunks[key]
+            html_body = self._render_chunk_document(qmd_content, base_path, content_root)
 
+            if html_body is not None:
+                # Step 5: Split by div markers (one sweep over the body)
+                rendered_chunks = self._split_rendered_chunks(html_body)
+                for key in chunk_keys:
                     # Unescape formula variables and convert to New Quizzes syntax
-                    rendered_map[key] = re.sub(r'QVAR_START_([a-zA-Z0-9_-]+)_QVAR_END', r'`\1`', rendered_map[key])
+                    rendered_map[key] = _RE_QVAR.sub(r'`\1`', rendered_chunks.get(key, processed_chunks[key]))
             else:
                 logger.warning("    Quarto render produced no output, using processed markdown")
                 rendered_map = processed_chunks
 
         except Exception as e:
-            logger.warning("    Quarto render error: %s", e)
+            logger.warning("    Quarto render error: %s", self._render_error(e))
             rendered_map = processed_chunks
-        finally:
-            self._cleanup(temp_qmd, temp_html, temp_files_dir)
 
         # Step 6: Apply rendered HTML back to question data
-        rendered_questions = []
-        for qi, q in enumerate(questions_data):
-            q = dict(q)
-
-            text_key = f"q{qi}_text"
-            if text_key in rendered_map:
-                q['question_text'] = rendered_map[text_key]
-
-            if q.get('answers'):
-                rendered_answers = []
-                for ai, ans in enumerate(q['answers']):
-                    ans = dict(ans)
-                    ans_key = f"q{qi}_a{ai}"
-                    if ans_key in rendered_map:
-                        ans['answer_html'] = rendered_map[ans_key]
-                        ans.pop('answer_text', None)
-                    rendered_answers.append(ans)
-                q['answers'] = rendered_answers
-
-            for comment_key in ['correct_comments', 'incorrect_comments']:
-                ck = f"q{qi}_{comment_key}"
-                if ck in rendered_map:
-                    q[comment_key] = rendered_map[ck]
-
-            rendered_questions.append(q)
-
-        return rendered_questions
+        return self._apply_rendered_chunks(questions_data, rendered_map)
 
     def _sync_questions(self, client, course_id, assignment_id, questions_data, content_root, file_path, mtime, map_entry):
         logger.info("    [cyan]Syncing %d questions to new quiz...[/cyan]", len(questions_data))
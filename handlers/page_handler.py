@@ -6,20 +6,25 @@ import shutil
 from canvasapi import Canvas
 from canvasapi.exceptions import BadRequest
 from handlers.base_handler import BaseHandler
-from handlers.content_utils import process_content, safe_delete_file, safe_delete_dir, get_mapped_id, save_mapped_id, parse_module_name
+from handlers.content_utils import process_content, safe_delete_file, safe_delete_dir, get_mapped_id, save_mapped_id, parse_module_name, frontmatter_may_contain, load_frontmatter_metadata, content_lock, TitleIndex
 from handlers.drift_detector import check_drift, store_canvas_hash
 from handlers.log import logger
 
 class PageHandler(BaseHandler):
+    # Pages by course and title, so title fallbacks don't each cost a search request
+    _page_index = TitleIndex(lambda course, **params: course.get_pages(**params))
+
     def can_handle(self, file_path: str) -> bool:
         if not file_path.endswith('.qmd'):
             return False
         if os.path.basename(file_path).startswith('_temp_'):
             return False
+        # Skip the YAML parse when the frontmatter can't say "type: page"
+        if not frontmatter_may_contain(file_path, b'page'):
+            return False
 
         try:
-            post = frontmatter.load(file_path)
-            canvas_meta = post.metadata.get('canvas', {})
+            canvas_meta = load_frontmatter_metadata(file_path).get('canvas', {})
             return canvas_meta.get('type') == 'page'
         except:
             return False
@@ -39,11 +44,6 @@ class PageHandler(BaseHandler):
             if map_entry.get('mtime') == current_mtime:
                 logger.debug("    No changes detected, skipping render")
                 needs_render = False
-                try:
-                    page_obj = course.get_page(existing_id)
-                except:
-                    logger.warning("    Previously synced page not found in Canvas, re-syncing")
-                    needs_render = True
 
         # 1b. Parse Metadata (Needed for Module indent even if skipping render)
         post = frontmatter.load(file_path)
@@ -60,6 +60,17 @@ class PageHandler(BaseHandler):
         base_path = os.path.dirname(file_path)
         processed_content = process_content(raw_content, base_path, course, content_root=content_root)
 
+        if not needs_render:
+            # An unchanged root page has nothing left to update: the Canvas
+            # page is only needed for module placement or the front-page flag.
+            if module is None and not front_page:
+                return
+            try:
+                page_obj = course.get_page(existing_id)
+            except:
+                logger.warning("    Previously synced page not found in Canvas, re-syncing")
+                needs_render = True
+
         if needs_render:
             # 2. Render HTML
             html_body = self.render_quarto_document(processed_content, base_path, filename, content_root=content_root)
@@ -95,30 +106,28 @@ class PageHandler(BaseHandler):
                     else:
                         raise
             else:
-                # 4b. Double check Title Search if not found by ID
-                pages = course.get_pages(search_term=title)
-                existing_item = None
-                for p in pages:
-                    if p.title == title:
-                        existing_item = p
-                        break
-
-                if existing_item:
-                    logger.info("    [yellow]Updating page:[/yellow] %s", title)
-                    logger.debug("    Matched by title search (ID: %s)", existing_item.page_id)
-                    try:
-                        existing_item.edit(**page_args)
-                    except BadRequest as e:
-                        if '"published"' in str(e):
-                            logger.warning("    Cannot change published state (page may be the course front page). Syncing content only.")
-                            page_args['wiki_page'].pop('published', None)
+                # 4b. Double check Title Search if not found by ID (locked
+                # against a JIT stub for this file being created meanwhile)
+                with content_lock(file_path):
+                    existing_item = self._page_index.find(course, title)
+
+                    if existing_item:
+                        logger.info("    [yellow]Updating page:[/yellow] %s", title)
+                        logger.debug("    Matched by title search (ID: %s)", existing_item.page_id)
+                        try:
                             existing_item.edit(**page_args)
-                        else:
-                            raise
-                    page_obj = existing_item
-                else:
-                    logger.info("    [green]Creating page:[/green] %s", title)
-                    page_obj = course.create_page(**page_args)
+                        except BadRequest as e:
+                            if '"published"' in str(e):
+                                logger.warning("    Cannot change published state (page may be the course front page). Syncing content only.")
+                                page_args['wiki_page'].pop('published', None)
+                                existing_item.edit(**page_args)
+                            else:
+                                raise
+                        page_obj = existing_item
+                    else:
+                        logger.info("    [green]Creating page:[/green] %s", title)
+                        page_obj = course.create_page(**page_args)
+                        self._page_index.remember(course, page_obj)
 
             # 4c. Update Sync Map and store content hash for drift detection
             if content_root:
@@ -8,8 +8,28 @@ using fenced div syntax (:::: question blocks).
 import re
 import yaml
 import textwrap
+import functools
 from handlers.log import logger
 
+# libyaml-backed loader when PyYAML was built with it; same safe tag subset.
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# Patterns used per line / per block are compiled once here.
+_RE_FRONTMATTER = re.compile(r'^---\s*\n(.*?)\n---\s*\n', re.DOTALL)
+_RE_OPEN_QUESTION = re.compile(r'^::::+\s*\{\.question(.*?)\}\s*$')
+_RE_ANSWER_DIV = re.compile(r'^:::+\s*\{\.answer', re.MULTILINE)
+_RE_CHECKBOX = re.compile(r'^(\s*)-\s*\[([ xX])\]\s*', re.MULTILINE)
+# A checklist answer runs until the next checkbox line or a ::: fence line
+_RE_CHECKBOX_STOP = re.compile(r'\n\s*(?:-\s*\[[ xX]\]|:::)')
+_RE_FORMULA_BLOCKS = [
+    re.compile(rf'^\s*:::+\s*\{{\.{block_name}[^}}]*\}}\s*\n.*?\n\s*:::+\s*$', re.MULTILINE | re.DOTALL)
+    for block_name in ('formula', 'variable')
+]
+_RE_COMMENT_DIVS = re.compile(r'^\s*:::+\s+(?:correct|incorrect)-comment\s*\n.*?\n\s*:::+\s*$', re.MULTILINE | re.DOTALL)
+
 
 def parse_qmd_quiz(content):
     """
@@ -25,13 +45,13 @@ def parse_qmd_quiz(content):
     # 1. Extract YAML frontmatter
     canvas_meta, body = _extract_frontmatter(content)
     
-    # 2. Extract question blocks
+    # 2. Extract question blocks (body is split into lines once; blocks are line lists)
     raw_blocks = _extract_question_blocks(body)
     
     # 3. Parse each question block
     questions = []
-    for i, (attrs_str, block_content) in enumerate(raw_blocks):
-        q = _parse_question_block(attrs_str, block_content, index=i)
+    for i, (attrs_str, block_lines) in enumerate(raw_blocks):
+        q = _parse_question_block(attrs_str, block_lines, index=i)
         if q:
             questions.append(q)
     
@@ -43,11 +63,11 @@ def _extract_frontmatter(content):
     Extract YAML frontmatter from the beginning of the file.
     Returns (canvas_meta dict, remaining body text).
     """
-    match = re.match(r'^---\s*\n(.*?)\n---\s*\n', content, re.DOTALL)
+    match = _RE_FRONTMATTER.match(content)
     if match:
         raw_yaml = match.group(1)
         try:
-            fm = yaml.safe_load(raw_yaml) or {}
+            fm = yaml.load(raw_yaml, Loader=_YamlLoader) or {}
         except yaml.YAMLError:
             fm = {}
         body = content[match.end():]
@@ -59,65 +79,64 @@ def _extract_question_blocks(body):
     """
     Find all :::: {.question ...} ... :::: blocks in the body.
     
-    Returns a list of (attributes_string, block_content) tuples.
+    Returns a list of (attributes_string, block_lines) tuples, where
+    block_lines is the block's dedented list of lines.
     Supports optional indentation inside blocks.
     """
+    def opener(stripped):
+        # :::: {.question ...} or ::::{.question ...}
+        match = _RE_OPEN_QUESTION.match(stripped)
+        return match.group(1).strip() if match else None
+
+    # Only :::: (4+ colons) fences change depth; ::: inner divs are content
+    blocks = _scan_blocks(body.split('\n'), '::::', opener,
+                          lambda rest: rest.lstrip()[:1] in ('{', '#'))
+    # Strip common leading whitespace (optional indentation)
+    return [(attrs_str, _strip_indent('\n'.join(block_lines)).split('\n'))
+            for attrs_str, block_lines in blocks]
+
+
+def _scan_blocks(lines, fence, opener, nests):
+    """
+    Collect fenced div blocks from a list of lines, tracking nesting depth.
+
+    Only lines starting with `fence` are considered. opener(stripped_line)
+    returns a value for a block opener and None otherwise; inside a block,
+    nests(rest) says whether a fence line (rest = text after its colons)
+    opens a nested div. Bare fences close a level and are not kept.
+    Returns a list of (opener_value, inner_lines) tuples; an unclosed block
+    runs to the end.
+    """
     blocks = []
-    
-    # Pattern: :::: {.question ...} at line start (with optional leading whitespace)
-    # We need to handle nested ::: divs inside, so we track colon depth
-    lines = body.split('\n')
+    n = len(lines)
     i = 0
-    
-    while i < len(lines):
-        line = lines[i].strip()
-        
-        # Match opening: :::: {.question ...} or ::::{.question ...}
-        open_match = re.match(r'^::::+\s*\{\.question(.*?)\}\s*$', line)
-        if open_match:
-            attrs_str = open_match.group(1).strip()
-            block_lines = []
-            depth = 1  # Track nesting of :::: blocks
-            i += 1
-            
-            while i < len(lines) and depth > 0:
-                stripped = lines[i].strip()
-                
-                # Count colons at start of stripped line
-                colon_match = re.match(r'^(::::+)', stripped)
-                if colon_match:
-                    colons = len(colon_match.group(1))
-                    rest = stripped[colons:].strip()
-                    
-                    if colons >= 4:
-                        if rest == '' or rest.startswith('{') or rest.startswith('#'):
-                            # Could be opening or closing
-                            if rest == '':
-                                # Closing ::::
-                                depth -= 1
-                                if depth == 0:
-                                    break
-                            else:
-                                # Opening ::::
-                                depth += 1
-                                block_lines.append(lines[i])
-                        else:
-                            block_lines.append(lines[i])
-                    else:
-                        # ::: (3 colons) — inner divs, just include them
-                        block_lines.append(lines[i])
-                else:
-                    block_lines.append(lines[i])
-                
-                i += 1
-            
-            block_content = '\n'.join(block_lines)
-            # Strip common leading whitespace (optional indentation)
-            block_content = _strip_indent(block_content)
-            blocks.append((attrs_str, block_content))
-        
+
+    while i < n:
+        stripped = lines[i].strip()
+        opened = opener(stripped) if stripped.startswith(fence) else None
         i += 1
-    
+        if opened is None:
+            continue
+
+        inner_lines = []
+        depth = 1
+        while i < n:
+            line = lines[i]
+            i += 1
+            stripped = line.strip()
+            if stripped.startswith(fence):
+                rest = stripped.lstrip(':')
+                if not rest:
+                    depth -= 1
+                    if depth == 0:
+                        break
+                    continue
+                if nests(rest):
+                    depth += 1
+            inner_lines.append(line)
+
+        blocks.append((opened, inner_lines))
+
     return blocks
 
 
@@ -126,57 +145,96 @@ def _strip_indent(text):
     Remove common leading whitespace from all non-empty lines.
     This enables the optional indentation feature.
     """
-    lines = text.split('\n')
-    # Find minimum indent of non-empty lines
-    min_indent = float('inf')
-    for line in lines:
-        if line.strip():  # Skip empty lines
-            stripped = len(line) - len(line.lstrip())
-            min_indent = min(min_indent, stripped)
-    
-    if min_indent == float('inf') or min_indent == 0:
-        return text
-    
-    dedented = []
-    for line in lines:
-        if line.strip():
-            dedented.append(line[min_indent:])
-        else:
-            dedented.append('')
-    
-    return '\n'.join(dedented)
+    # Whitespace-only lines don't count towards the common indent
+    text = '\n'.join(line if line.strip() else '' for line in text.split('\n'))
+    return textwrap.dedent(text)
 
 
 def _parse_attributes(attrs_str):
     """
     Parse div attributes like: name="Spänning" points=2 type=essay_question
-    Returns a dict.
+    Returns a dict. A `.correct` class token sets attrs['correct'] = True.
     """
     attrs = {}
-    # Match key="value" or key=value patterns
-    for match in re.finditer(r'(\w+)\s*=\s*(?:"([^"]*?)"|(\S+))', attrs_str):
-        key = match.group(1)
-        value = match.group(2) if match.group(2) is not None else match.group(3)
-        # Try to convert numeric values
-        try:
-            value = int(value)
-        except (ValueError, TypeError):
-            try:
-                value = float(value)
-            except (ValueError, TypeError):
-                pass
-        attrs[key] = value
+    correct_class = False
+    n = len(attrs_str)
+    i = 0
+    while i < n:
+        ch = attrs_str[i]
+
+        # .class shorthand: only a standalone .correct carries meaning
+        if ch == '.' and (i == 0 or attrs_str[i - 1].isspace()):
+            end = i + 1
+            while end < n and not attrs_str[end].isspace():
+                end += 1
+            if attrs_str[i + 1:end] == 'correct':
+                correct_class = True
+                i = end
+                continue
+
+        if not (ch.isalnum() or ch == '_'):
+            i += 1
+            continue
+
+        # key
+        start = i
+        while i < n and (attrs_str[i].isalnum() or attrs_str[i] == '_'):
+            i += 1
+        key = attrs_str[start:i]
+        j = i
+        while j < n and attrs_str[j].isspace():
+            j += 1
+        if j >= n or attrs_str[j] != '=':
+            continue
+        j += 1
+        while j < n and attrs_str[j].isspace():
+            j += 1
+        if j >= n:
+            break
+
+        # value: "quoted" (if closed) or a run of non-space characters
+        close = attrs_str.find('"', j + 1) if attrs_str[j] == '"' else -1
+        if close != -1:
+            value = attrs_str[j + 1:close]
+            i = close + 1
+        else:
+            end = j
+            while end < n and not attrs_str[end].isspace():
+                end += 1
+            value = attrs_str[j:end]
+            i = end
+        attrs[key] = _coerce_number(value)
+
+    if correct_class:
+        attrs['correct'] = True
     return attrs
 
 
-def _parse_question_block(attrs_str, content, index=0):
+def _coerce_number(value):
+    """Return value as int or float if it is written as a number, else unchanged."""
+    digits = value[1:] if value[:1] in ('-', '+') else value
+    if digits.isdecimal():
+        return int(value)
+    # Only numeric-looking text reaches float(), so 'nan'/'inf' stay strings
+    if digits[:1].isdecimal() or (digits[:1] == '.' and digits[1:2].isdecimal()):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return value
+
+
+def _parse_question_block(attrs_str, lines, index=0):
     """
-    Parse a single question block into a question dict.
+    Parse a single question block (a list of lines, or a string) into a question dict.
     
     Handles both:
     - Checklist answers: - [x] / - [ ] with optional sub-item comments
     - Rich div answers: ::: {.answer ...} blocks
     """
+    if isinstance(lines, str):
+        lines = lines.split('\n')
+    content = '\n'.join(lines)
     attrs = _parse_attributes(attrs_str)
     
     question = {
@@ -186,42 +244,45 @@ def _parse_question_block(attrs_str, content, index=0):
     }
     
     if question['question_type'] == 'formula_question':
-        _parse_formula_blocks(content, question)
+        _parse_formula_blocks(content, question, lines)
     else:
         # Detect answer format: div-based or checklist-based
-        has_div_answers = re.search(r'^:::+\s*\{\.answer', content, re.MULTILINE)
+        has_div_answers = '{.answer' in content and _RE_ANSWER_DIV.search(content)
         if has_div_answers:
-            _parse_div_answers(content, question)
+            _parse_div_answers(content, question, lines)
         else:
             _parse_checklist_answers(content, question)
     
     # Extract comment divs (correct-comment, incorrect-comment)
-    _parse_comment_divs(content, question)
+    if 'correct-comment' in content:
+        _parse_comment_divs(lines, question)
     
     return question
 
-def _parse_formula_blocks(content, question):
+def _parse_formula_blocks(content, question, lines=None):
     """
     Parse ::: {.formula} and ::: {.variable} blocks.
     Sets question variables and formula data, and extracts question_text.
     """
-    formula_blocks = _extract_inner_divs(content, 'formula')
+    if lines is None:
+        lines = content.split('\n')
+    formula_blocks = _extract_inner_divs(lines, 'formula')
     if formula_blocks:
         attrs_str, formula_content = formula_blocks[0]
         try:
-            f_data = yaml.safe_load(formula_content) or {}
+            f_data = yaml.load(formula_content, Loader=_YamlLoader) or {}
             question.update(f_data)
         except Exception as e:
             logger.error("Failed to parse formula block: %s", e)
             
     variables = []
-    variable_blocks = _extract_inner_divs(content, 'variable')
+    variable_blocks = _extract_inner_divs(lines, 'variable')
     for attrs_str, var_content in variable_blocks:
         attrs = _parse_attributes(attrs_str)
         name = attrs.get('name')
         if name:
             try:
-                v_data = yaml.safe_load(var_content) or {}
+                v_data = yaml.load(var_content, Loader=_YamlLoader) or {}
                 v_data['name'] = name
                 variables.append(v_data)
             except Exception as e:
@@ -231,9 +292,8 @@ def _parse_formula_blocks(content, question):
         question['variables'] = variables
         
     # Remove formula and variable blocks from content to get clean question text
-    for block_name in ['formula', 'variable']:
-        pattern = rf'^\s*:::+\s*\{{\.{block_name}[^}}]*\}}\s*\n.*?\n\s*:::+\s*$'
-        content = re.sub(pattern, '', content, flags=re.MULTILINE | re.DOTALL)
+    for pattern in _RE_FORMULA_BLOCKS:
+        content = pattern.sub('', content)
         
     question_text = _remove_comment_divs(content)
     question['question_text'] = _clean_question_text(question_text)
@@ -249,7 +309,7 @@ def _parse_checklist_answers(content, question):
     Sets question['question_text'] and question['answers'].
     """
     # Find the first checklist item to split question text from answers
-    first_check = re.search(r'^(\s*)-\s*\[([ xX])\]\s*', content, re.MULTILINE)
+    first_check = _RE_CHECKBOX.search(content)
     
     if first_check:
         question_text = content[:first_check.start()].strip()
@@ -269,14 +329,19 @@ def _parse_checklist_answers(content, question):
     answers = []
     
     # Split into answer blocks: each starts with - [x] or - [ ]
-    answer_pattern = re.compile(r'^(\s*)-\s*\[([ xX])\]\s*(.*?)(?=\n\s*-\s*\[[ xX]\]|\n\s*:::|\Z)', re.MULTILINE | re.DOTALL)
-    
     # Remove comment divs from answers section before parsing
     answers_clean = _remove_comment_divs(answers_section)
     
-    for match in answer_pattern.finditer(answers_clean):
+    pos = 0
+    while True:
+        match = _RE_CHECKBOX.search(answers_clean, pos)
+        if not match:
+            break
+        stop = _RE_CHECKBOX_STOP.search(answers_clean, match.end())
+        pos = stop.start() if stop else len(answers_clean)
+
         checked = match.group(2).lower() == 'x'
-        answer_content = match.group(3).strip()
+        answer_content = answers_clean[match.end():pos].strip()
         
         # Check for sub-item comment (indented - below the answer)
         lines = answer_content.split('\n')
@@ -286,9 +351,8 @@ def _parse_checklist_answers(content, question):
         for line in lines[1:]:
             stripped = line.strip()
             # Sub-item: starts with - (after stripping indent)
-            sub_match = re.match(r'^-\s+(.*)', stripped)
-            if sub_match:
-                answer_comment = sub_match.group(1).strip()
+            if stripped[:1] == '-' and stripped[1:2].isspace():
+                answer_comment = stripped[1:].strip()
         
         answer_dict = {
             'answer_text': answer_text,
@@ -302,7 +366,7 @@ def _parse_checklist_answers(content, question):
     question['answers'] = answers
 
 
-def _parse_div_answers(content, question):
+def _parse_div_answers(content, question, lines=None):
     """
     Parse div-style answers:
       ::: {.answer correct=true comment="..."}
@@ -315,7 +379,7 @@ def _parse_div_answers(content, question):
     answers = []
     
     # First, find where the first answer div starts to split question text
-    first_answer = re.search(r'^:::+\s*\{\.answer', content, re.MULTILINE)
+    first_answer = _RE_ANSWER_DIV.search(content)
     if first_answer:
         question_text = content[:first_answer.start()].strip()
     else:
@@ -327,20 +391,16 @@ def _parse_div_answers(content, question):
     
     # Extract answer div blocks
     # Pattern: ::: {.answer ...} ... :::
-    answer_blocks = _extract_inner_divs(content, 'answer')
+    answer_blocks = _extract_inner_divs(content if lines is None else lines, 'answer')
     
     for attrs_str, answer_content in answer_blocks:
         attrs = _parse_attributes(attrs_str)
         
         # Check for 'correct' attribute (correct=true or .correct class)
-        is_correct = False
-        if attrs.get('correct') in (True, 'true', 'True', 1):
-            is_correct = True
-        # Also check for .correct class in the attrs string
-        if '.correct' in attrs_str:
-            is_correct = True
+        is_correct = attrs.get('correct') in (True, 'true', 'True', 1)
         
-        answer_content = _strip_indent(answer_content).strip()
+        # Already dedented by _extract_inner_divs
+        answer_content = answer_content.strip()
         
         answer_dict = {
             'answer_weight': 100 if is_correct else 0,
@@ -364,125 +424,75 @@ def _parse_div_answers(content, question):
     question['answers'] = answers
 
 
-def _extract_inner_divs(content, div_class):
+@functools.lru_cache(maxsize=16)
+def _inner_div_open_pattern(div_class):
+    """Compiled opener for ::: {.div_class ...}; only a handful of classes are used."""
+    return re.compile(rf'^:::+\s*\{{\.{re.escape(div_class)}(.*?)\}}\s*$')
+
+
+def _extract_inner_divs(lines, div_class):
     """
-    Extract all ::: {.div_class ...} ... ::: blocks from content.
+    Extract all ::: {.div_class ...} ... ::: blocks from content
+    (a list of lines, or a string).
     Returns list of (attrs_str, inner_content) tuples.
     """
-    results = []
-    lines = content.split('\n')
-    i = 0
-    
-    while i < len(lines):
-        stripped = lines[i].strip()
-        
-        # Match opening ::: {.div_class ...}
-        pattern = rf'^:::+\s*\{{\.{re.escape(div_class)}(.*?)\}}\s*$'
-        open_match = re.match(pattern, stripped)
-        
-        if open_match:
-            attrs_str = open_match.group(1).strip()
-            inner_lines = []
-            depth = 1
-            i += 1
-            
-            while i < len(lines) and depth > 0:
-                stripped_inner = lines[i].strip()
-                colon_match = re.match(r'^(:::+)', stripped_inner)
-                
-                if colon_match:
-                    colons = len(colon_match.group(1))
-                    rest = stripped_inner[colons:].strip()
-                    
-                    if colons == 3 or colons == len(colon_match.group(1)):
-                        if rest == '':
-                            depth -= 1
-                            if depth == 0:
-                                break
-                        elif rest.startswith('{'):
-                            depth += 1
-                            inner_lines.append(lines[i])
-                        else:
-                            inner_lines.append(lines[i])
-                    else:
-                        inner_lines.append(lines[i])
-                else:
-                    inner_lines.append(lines[i])
-                
-                i += 1
-            
-            inner_content = '\n'.join(inner_lines)
-            results.append((attrs_str, _strip_indent(inner_content)))
-        
-        i += 1
-    
-    return results
+    if isinstance(lines, str):
+        lines = lines.split('\n')
+    # Match opening ::: {.div_class ...}
+    open_pattern = _inner_div_open_pattern(div_class)
 
+    def opener(stripped):
+        match = open_pattern.match(stripped)
+        return match.group(1).strip() if match else None
 
-def _parse_comment_divs(content, question):
+    blocks = _scan_blocks(lines, ':::', opener, lambda rest: rest.lstrip()[:1] == '{')
+    return [(attrs_str, _strip_indent('\n'.join(inner_lines)))
+            for attrs_str, inner_lines in blocks]
+
+
+def _parse_comment_divs(lines, question):
     """
     Extract ::: correct-comment and ::: incorrect-comment divs.
     Sets question['correct_comments'] and question['incorrect_comments'].
     """
     for comment_type in ['correct-comment', 'incorrect-comment']:
-        divs = _extract_named_divs(content, comment_type)
+        divs = _extract_named_divs(lines, comment_type)
         if divs:
             # Use the first match
             key = comment_type.replace('-', '_').replace('comment', 'comments')
             question[key] = _strip_indent(divs[0]).strip()
 
 
-def _extract_named_divs(content, div_name):
+def _extract_named_divs(lines, div_name):
     """
-    Extract all ::: div_name ... ::: blocks (without class syntax).
+    Extract all ::: div_name ... ::: blocks (without class syntax) from
+    content (a list of lines, or a string).
     Returns list of inner content strings.
     """
-    results = []
-    lines = content.split('\n')
-    i = 0
-    
-    while i < len(lines):
-        stripped = lines[i].strip()
-        
-        # Match opening ::: div_name or :::div_name
-        pattern = rf'^:::+\s+{re.escape(div_name)}\s*$'
-        if re.match(pattern, stripped):
-            inner_lines = []
-            depth = 1
-            i += 1
-            
-            while i < len(lines) and depth > 0:
-                stripped_inner = lines[i].strip()
-                colon_match = re.match(r'^(:::+)\s*$', stripped_inner)
-                
-                if colon_match:
-                    depth -= 1
-                    if depth == 0:
-                        break
-                elif re.match(r'^:::+\s+\S', stripped_inner) or re.match(r'^:::+\s*\{', stripped_inner):
-                    depth += 1
-                    inner_lines.append(lines[i])
-                else:
-                    inner_lines.append(lines[i])
-                
-                i += 1
-            
-            results.append('\n'.join(inner_lines))
-        
-        i += 1
-    
-    return results
+    if isinstance(lines, str):
+        lines = lines.split('\n')
+
+    def opener(stripped):
+        # Opening "::: div_name": a run of colons, whitespace, then the name
+        parts = stripped.split(None, 1)
+        if len(parts) == 2 and parts[1] == div_name and not parts[0].strip(':'):
+            return div_name
+        return None
+
+    # Nested "::: name" and "::: {.class}" divs both open a level
+    blocks = _scan_blocks(lines, ':::', opener, lambda rest: rest[0].isspace() or rest[0] == '{')
+    return ['\n'.join(inner_lines) for _, inner_lines in blocks]
 
 
 def _remove_comment_divs(text):
     """
     Remove ::: correct-comment and ::: incorrect-comment blocks from text.
     """
-    for div_name in ['correct-comment', 'incorrect-comment']:
-        # Remove the entire div block
-        pattern = rf'^\s*:::+\s+{re.escape(div_name)}\s*\n.*?\n\s*:::+\s*$'
-        text = re.sub(pattern, '', text, flags=re.MULTILINE | re.DOTALL)
-    return text
+    # Most questions have no comment divs ("incorrect-comment" contains this too)
+    if 'correct-comment' not in text:
+        return text
+    # Remove the entire div blocks, both kinds in one pass
+    return _RE_COMMENT_DIVS.sub('', text)
 
 
 def _clean_question_text(text):
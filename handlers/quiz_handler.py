@@ -1,28 +1,152 @@
 import json
 import os
-import subprocess
 import re
-import frontmatter
+import sys
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
-from handlers.base_handler import BaseHandler
-from handlers.content_utils import get_mapped_id, save_mapped_id, parse_module_name, process_content, safe_delete_file, safe_delete_dir
+from handlers.base_handler import BaseHandler, _render_config_fingerprint
+from handlers.content_utils import get_mapped_id, save_mapped_id, parse_module_name, process_content, process_content_many, safe_delete_file, safe_delete_dir, canvas_retry, content_lock, TitleIndex, load_frontmatter_metadata
 from handlers.qmd_quiz_parser import parse_qmd_quiz
 from handlers.log import logger
 
+# orjson parses quiz JSON several times faster when installed; same result.
+# Files are read as bytes, which both parsers accept directly.
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+# First read of a candidate file; most quiz files fit entirely.
+_PEEK_BYTES = 4096
+
+# Quiz JSON whose first key already gives the format away:
+# {"questions": ...} or [{"question_name": ...
+_RE_JSON_QUIZ_HEAD = re.compile(rb'\s*(?:\{\s*"questions"|\[\s*\{\s*"question_name")\s*:')
+
+# Quiz settings copied from frontmatter under the same name in Canvas
+_QUIZ_DATE_KEYS = ('due_at', 'unlock_at', 'lock_at')
+_QUIZ_SETTING_KEYS = (
+    'show_correct_answers', 'shuffle_answers', 'time_limit', 'allowed_attempts',
+    'one_question_at_a_time', 'cant_go_back', 'access_code',
+)
+
+# Concurrent question create/edit requests per quiz
+QUESTION_SYNC_WORKERS = 8
+
+
+# Question-level feedback, sent under the same names Canvas returns
+_QUESTION_COMMENT_KEYS = ('correct_comments', 'incorrect_comments', 'neutral_comments')
+
+# Answer keys as we send them -> as Canvas returns them on a QuizQuestion
+_ANSWER_KEYS = {
+    'answer_text': 'text',
+    'answer_html': 'html',
+    'answer_weight': 'weight',
+    'answer_comments': 'comments',
+}
+
+
+def _canon_answers(answers, extra_keys=()):
+    """
+    Projects answers (local dicts or Canvas' returned ones) onto the fields we
+    control, so a comparison ignores Canvas-only keys like ids and the
+    answer_*/text naming difference. `extra_keys` adds pass-through fields
+    (e.g. exact/margin for numerical answers).
+    """
+    return tuple(
+        (
+            a.get('answer_html') or a.get('html') or a.get('answer_text') or a.get('text') or '',
+            a.get('answer_weight', a.get('weight', 0)),
+            a.get('answer_comments') or a.get('comments') or '',
+            tuple(a.get(k) for k in extra_keys),
+        )
+        for a in answers or ()
+    )
+
+
+def _answer_extra_keys(answers):
+    """Pass-through keys used by local answers, beyond the standard ones."""
+    keys = set()
+    for a in answers or ():
+        keys.update(a)
+    return tuple(sorted(keys - set(_ANSWER_KEYS) - set(_ANSWER_KEYS.values())))
+
+
+def _questions_hash(questions_data, render_config=''):
+    """
+    Digest of the parsed (pre-render) questions, stored in the sync map.
+    `render_config` (see _render_config_fingerprint) ties it to the Quarto
+    setup the questions were rendered with.
+    """
+    raw = json.dumps(questions_data, sort_keys=True, ensure_ascii=False, default=str)
+    if render_config:
+        raw += '\0' + render_config
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _question_hashes(questions_data, render_config=''):
+    """Per-question digests by name; names used more than once are left out."""
+    hashes = {}
+    seen = set()
+    for q in questions_data:
+        name = q.get('question_name')
+        if not isinstance(name, str):
+            continue
+        if name in seen:
+            hashes.pop(name, None)
+            continue
+        seen.add(name)
+        hashes[name] = _questions_hash(q, render_config)
+    return hashes
+
+
+def _files_fingerprint(paths):
+    """
+    Change marker for a set of files (None or missing files allowed): a digest
+    of each file's (mtime_ns, size), so an edit to any of them changes it.
+    """
+    parts = []
+    for path in paths:
+        try:
+            st = os.stat(path) if path else None
+        except OSError:
+            st = None
+        parts.append((st.st_mtime_ns, st.st_size) if st else None)
+    return hashlib.blake2b(repr(parts).encode('ascii'), digest_size=8).hexdigest()
+
 class QuizHandler(BaseHandler):
+    # Quizzes by course and title, so title fallbacks don't each cost a search request
+    _quiz_index = TitleIndex(lambda course, **params: course.get_quizzes(**params))
+
+    # {path: (mtime_ns, text, parsed_json_or_None)} — what can_handle() read
+    # for a file it accepted, taken by sync() so the file is read once.
+    _parse_cache = {}
+
     def can_handle(self, file_path: str) -> bool:
         # JSON quiz files
         if file_path.endswith('.json'):
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-
-                # New Format check
-                if isinstance(data, dict) and 'questions' in data:
-                    return True
-
-                # Legacy Format check (list of questions)
-                if isinstance(data, list) and len(data) > 0 and 'question_name' in data[0]:
+                with open(file_path, 'rb') as f:
+                    head = f.read(_PEEK_BYTES)
+                    # Unambiguous layouts are decided from the first bytes
+                    if _RE_JSON_QUIZ_HEAD.match(head):
+                        return True
+                    if head.lstrip()[:1] not in (b'{', b'['):
+                        return False
+                    raw = head + f.read()
+                    mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+
+                # Neither key can be present without its name in the text
+                if b'"question' not in raw:
+                    return False
+                # Both parsers take the bytes as read; no str copy unless accepted
+                data = _json_loads(raw)
+
+                # New Format check, or Legacy Format check (list of questions)
+                if ((isinstance(data, dict) and 'questions' in data)
+                        or (isinstance(data, list) and len(data) > 0 and 'question_name' in data[0])):
+                    self._parse_cache[file_path] = (mtime_ns, raw.decode('utf-8'), data)
                     return True
 
                 return False
@@ -32,21 +156,27 @@ class QuizHandler(BaseHandler):
         # QMD quiz files
         if file_path.endswith('.qmd'):
             try:
-                post = frontmatter.load(file_path)
-                if post.metadata.get('canvas', {}).get('type') == 'quiz':
-                    return True
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                    mtime_ns = os.fstat(f.fileno()).st_mtime_ns
             except:
-                pass
+                return False
 
+            # Shares the parse the handlers earlier in the chain already did
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read(4096)  # Read enough to check
+                is_quiz = load_frontmatter_metadata(file_path).get('canvas', {}).get('type') == 'quiz'
+            except:
+                is_quiz = False
 
+            if not is_quiz:
                 # Check for structural quiz components as a fallback
                 # This ensures we still support .qmd quizzes that are missing the `canvas: type: quiz` frontmatter flag
-                return ':::: {.question' in content or '::::{.question' in content
-            except:
-                return False
+                head = content[:_PEEK_BYTES]
+                is_quiz = ':::: {.question' in head or '::::{.question' in head
+
+            if is_quiz:
+                self._parse_cache[file_path] = (mtime_ns, content, None)
+            return is_quiz
 
         return False
 
@@ -59,11 +189,15 @@ class QuizHandler(BaseHandler):
         canvas_meta = {}
         title_override = None
         is_qmd = file_path.endswith('.qmd')
+        cached = self._take_cached(file_path)
 
         if is_qmd:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    raw_content = f.read()
+                if cached:
+                    raw_content = cached[0]
+                else:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        raw_content = f.read()
                 canvas_meta, questions_data = parse_qmd_quiz(raw_content)
                 title_override = canvas_meta.get('title')
 
@@ -72,8 +206,13 @@ class QuizHandler(BaseHandler):
                 return
         else:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                if cached and cached[1] is not None:
+                    raw_content, data = cached
+                else:
+                    with open(file_path, 'rb') as f:
+                        raw = f.read()
+                    data = _json_loads(raw)
+                    raw_content = raw.decode('utf-8')
 
                 if isinstance(data, dict) and 'questions' in data:
                     # New Format: {"canvas": {...}, "questions": [...]}
@@ -107,7 +246,9 @@ class QuizHandler(BaseHandler):
         # We discard the returned HTML because we only want the side-effect of
         # registering active assets to prevent them from being orphaned if no update is needed.
         base_path = os.path.dirname(file_path)
-        _ = process_content(raw_content if is_qmd else json.dumps(data), base_path, course, content_root=content_root)
+        # For JSON the file text itself is scanned; re-serializing the parsed
+        # data would only reproduce the same escaped strings.
+        _ = process_content(raw_content, base_path, course, content_root=content_root)
 
         # Process description_file if provided to track its assets too
         if 'description_file' in canvas_meta:
@@ -121,29 +262,28 @@ class QuizHandler(BaseHandler):
         # 2. Find/Create Quiz
         existing_quiz = None
 
-        json_mtime = os.path.getmtime(file_path)
-        desc_mtime = 0
+        current_mtime = os.path.getmtime(file_path)
         desc_file_path = None
 
         if 'description_file' in canvas_meta:
              desc_file_path = os.path.join(os.path.dirname(file_path), canvas_meta['description_file'])
-             if os.path.exists(desc_file_path):
-                 desc_mtime = os.path.getmtime(desc_file_path)
 
-        # Compound mtime to detect changes in either file
-        current_mtime = json_mtime + desc_mtime
+        # Detect changes in either file
+        fingerprint = _files_fingerprint((file_path, desc_file_path))
 
         existing_id, map_entry = get_mapped_id(content_root, file_path) if content_root else (None, None)
 
         needs_update = True
         quiz_obj = None
+        found_by_id = False
 
         # 2a. Try ID lookup via Sync Map
         if existing_id:
             try:
                 quiz_obj = course.get_quiz(existing_id)
-                # Smart Sync: Skip if mtime matches
-                if isinstance(map_entry, dict) and map_entry.get('mtime') == current_mtime:
+                found_by_id = True
+                # Smart Sync: Skip if neither file changed
+                if isinstance(map_entry, dict) and map_entry.get('fingerprint') == fingerprint:
                     logger.debug("    No changes detected, skipping update")
                     needs_update = False
             except:
@@ -151,23 +291,39 @@ class QuizHandler(BaseHandler):
 
         # 2b. Fallback to Title Search
         if not quiz_obj:
-            quizzes = course.get_quizzes(search_term=title)
-            for q in quizzes:
-                if q.title == title:
-                    quiz_obj = q
-                    break
+            quiz_obj = self._quiz_index.find(course, title)
 
         if needs_update:
+            # Questions are unchanged since the last sync of this same quiz when
+            # their hash matches; then only settings/description need pushing.
+            # The Quarto config is hashed too, so editing _quarto.yml re-renders.
+            base_path = os.path.dirname(file_path)
+            render_config = _render_config_fingerprint(base_path, content_root or base_path)
+            questions_hash = _questions_hash(questions_data, render_config)
+            questions_unchanged = (
+                found_by_id and isinstance(map_entry, dict)
+                and map_entry.get('questions_hash') == questions_hash
+            )
+            # Likewise per question, so only edited questions are compared
+            question_hashes = _question_hashes(questions_data, render_config)
+            synced_hashes = {}
+            if found_by_id and isinstance(map_entry, dict):
+                synced_hashes = map_entry.get('question_hashes') or {}
+
             # Render question/answer markdown content to HTML (for both QMD and JSON)
             # This fixes LaTeX rendering issues in JSON quizzes by passing them through Quarto.
             # Moved here to avoid rendering if the quiz is already up-to-date.
-            try:
-                base_path = os.path.dirname(file_path)
-                questions_data = self._render_qmd_questions(
-                    questions_data, base_path, course, content_root
-                )
-            except Exception as e:
-                logger.warning("    Failed to render quiz content through Quarto: %s", e)
+            # Hashes are only stored for fully rendered questions: after a
+            # fallback to markdown, the next sync must render them again.
+            questions_rendered = True
+            if not questions_unchanged:
+                try:
+                    questions_data, questions_rendered = self._render_qmd_questions(
+                        questions_data, base_path, course, content_root
+                    )
+                except Exception as e:
+                    logger.warning("    Failed to render quiz content through Quarto: %s", e)
+                    questions_rendered = False
 
             # 1b. Render description_file if provided (Only if updating)
             description_html = None
@@ -183,33 +339,18 @@ class QuizHandler(BaseHandler):
             }
 
             # Optional Advanced Options
-            setting_map = {
-                'description': 'description',
-                'due_at': 'due_at',
-                'unlock_at': 'unlock_at',
-                'lock_at': 'lock_at',
-                'show_correct_answers': 'show_correct_answers',
-                'shuffle_answers': 'shuffle_answers',
-                'time_limit': 'time_limit',
-                'allowed_attempts': 'allowed_attempts',
-                'one_question_at_a_time': 'one_question_at_a_time',
-                'cant_go_back': 'cant_go_back',
-                'access_code': 'access_code'
-            }
-
-            for local_key, canvas_key in setting_map.items():
-                if local_key in ['due_at', 'unlock_at', 'lock_at']:
-                    # Source of Truth: Use empty string to explicitly clear dates in Canvas API
-                    # (None values are ignored by the API, but '' clears the field)
-                    quiz_payload[canvas_key] = canvas_meta.get(local_key) or ''
-                elif local_key == 'description':
-                    # description_file takes precedence over inline description
-                    if description_html:
-                        quiz_payload[canvas_key] = description_html
-                    elif local_key in canvas_meta:
-                        quiz_payload[canvas_key] = canvas_meta[local_key]
-                elif local_key in canvas_meta:
-                    quiz_payload[canvas_key] = canvas_meta[local_key]
+            # Source of Truth: Use empty string to explicitly clear dates in Canvas API
+            # (None values are ignored by the API, but '' clears the field)
+            for key in _QUIZ_DATE_KEYS:
+                quiz_payload[key] = canvas_meta.get(key) or ''
+            for key in _QUIZ_SETTING_KEYS:
+                if key in canvas_meta:
+                    quiz_payload[key] = canvas_meta[key]
+            # description_file takes precedence over inline description
+            if description_html:
+                quiz_payload['description'] = description_html
+            elif 'description' in canvas_meta:
+                quiz_payload['description'] = canvas_meta['description']
 
             # 2c. Prepare Quiz
             # For quizzes without submissions: unpublish -> update -> republish
@@ -219,80 +360,113 @@ class QuizHandler(BaseHandler):
             target_published = quiz_payload['published']
             has_submissions = False
 
-            if quiz_obj:
+            created = False
+            if not quiz_obj:
+                # Looked up again under the lock JIT stubs for links to this
+                # file take, as one may have been created since step 2b
+                with content_lock(file_path):
+                    quiz_obj = self._quiz_index.find(course, title)
+                    if not quiz_obj:
+                        logger.info("    [green]Creating quiz:[/green] %s", title)
+                        quiz_payload['published'] = False
+                        quiz_obj = course.create_quiz(quiz=quiz_payload)
+                        self._quiz_index.remember(course, quiz_obj)
+                        created = True
+
+            if not created:
                 logger.info("    [yellow]Updating quiz:[/yellow] %s", title)
                 try:
-                    # Try to unpublish (Draft Mode). This triggers generate_quiz_data on republish.
-                    quiz_obj.edit(quiz={'published': False})
+                    # Apply settings in Draft Mode. Unpublishing triggers generate_quiz_data on republish.
                     quiz_payload['published'] = False
+                    quiz_obj.edit(quiz=quiz_payload)
                 except Exception as e:
                     err_str = str(e)
                     if "Can't unpublish" in err_str:
                          logger.warning("    Quiz has submissions, skipping draft mode")
                          has_submissions = True
-                         quiz_payload['published'] = True
                     else:
                          logger.warning("    Could not unpublish quiz: %s", e)
-                         quiz_payload['published'] = True
-
-                # Apply settings (description, time limit, etc.)
-                quiz_obj.edit(quiz=quiz_payload)
-            else:
-                logger.info("    [green]Creating quiz:[/green] %s", title)
-                quiz_payload['published'] = False
-                quiz_obj = course.create_quiz(quiz=quiz_payload)
+                    # Apply settings (description, time limit, etc.) while staying published
+                    quiz_payload['published'] = True
+                    quiz_obj.edit(quiz=quiz_payload)
 
             # Restore target published state for later
             quiz_payload['published'] = target_published
 
-            # 2c. Update Sync Map
+            # 2c. Update Sync Map (questions_hash is only kept once questions are in sync)
             if content_root:
-                save_mapped_id(content_root, file_path, quiz_obj.id, mtime=current_mtime)
+                extra = {'questions_hash': questions_hash, 'question_hashes': question_hashes} if questions_unchanged else {}
+                save_mapped_id(content_root, file_path, quiz_obj.id, mtime=current_mtime, fingerprint=fingerprint, **extra)
 
             # 3. Add/Update Questions
-            logger.info("    [cyan]Syncing %d questions...[/cyan]", len(questions_data))
-            existing_questions = list(quiz_obj.get_questions())
-
-            existing_q_map = {}
-            for q in existing_questions:
-                if q.question_name not in existing_q_map:
-                    existing_q_map[q.question_name] = []
-                existing_q_map[q.question_name].append(q)
-
-            for q_data in questions_data:
-                q_name = q_data.get('question_name')
-
-                # Pop the first matching existing question to adopt
-                if q_name and q_name in existing_q_map and len(existing_q_map[q_name]) > 0:
-                    existing_q = existing_q_map[q_name].pop(0)
-
-                    # Safer Comparison logic
-                    q_needs_update = False
-
-                    if getattr(existing_q, 'question_text', '') != q_data.get('question_text', ''):
-                        q_needs_update = True
-                    elif getattr(existing_q, 'points_possible', 0) != q_data.get('points_possible', 0):
-                        q_needs_update = True
-                    elif getattr(existing_q, 'question_type', '') != q_data.get('question_type', ''):
-                        q_needs_update = True
-                    elif getattr(existing_q, 'answers', []) != q_data.get('answers', []):
-                        q_needs_update = True
-
-                    if q_needs_update:
-                        logger.debug("    Updating question: %s", q_name)
-                        existing_q.edit(question=q_data)
-                else:
-                    logger.info("    [green]Adding new question:[/green] %s", q_name)
-                    quiz_obj.create_question(question=q_data)
-
-            # 3b. Cleanup remaining orphaned or duplicated items on Canvas
-            for q_name, items_list in existing_q_map.items():
-                for existing_q in items_list:
-                    logger.info("    [red]Deleting orphaned question:[/red] %s", q_name)
-                    try:
-                        existing_q.delete()
-                    except Exception as e:
-                        logger.error("      Failed to delete question: %s", e)
+            if questions_unchanged:
+                logger.debug("    Questions unchanged since last sync, skipping question sync")
+            else:
+                logger.info("    [cyan]Syncing %d questions...[/cyan]", len(questions_data))
+                # Built in one pass over the paginated listing, 100 questions per
+                # request. Names are interned so the per-question lookups below
+                # mostly hit the identity fast path of str equality
+                existing_q_map = {}
+                for q in quiz_obj.get_questions(per_page=100):
+                    existing_q_map.setdefault(sys.intern(q.question_name or ''), []).append(q)
+
+                to_update = []
+                to_create = []
+                for position, q_data in enumerate(questions_data, start=1):
+                    q_name = q_data.get('question_name')
+                    if isinstance(q_name, str):
+                        q_name = sys.intern(q_name)
+
+                    # Pop the first matching existing question to adopt
+                    if q_name and existing_q_map.get(q_name):
+                        existing_q = existing_q_map[q_name].pop(0)
+
+                        # A question edited since its last sync is always sent;
+                        # one never synced by hash is compared with Canvas first
+                        synced_hash = synced_hashes.get(q_name)
+                        if synced_hash is not None:
+                            changed = synced_hash != question_hashes.get(q_name)
+                        else:
+                            # Compare only the fields we send, in one tuple
+                            local_answers = q_data.get('answers', [])
+                            extra_keys = _answer_extra_keys(local_answers)
+                            current = (
+                                getattr(existing_q, 'question_text', ''),
+                                getattr(existing_q, 'points_possible', 0),
+                                getattr(existing_q, 'question_type', ''),
+                                tuple(getattr(existing_q, k, None) or '' for k in _QUESTION_COMMENT_KEYS),
+                                _canon_answers(getattr(existing_q, 'answers', []), extra_keys),
+                            )
+                            wanted = (
+                                q_data.get('question_text', ''),
+                                q_data.get('points_possible', 0),
+                                q_data.get('question_type', ''),
+                                tuple(q_data.get(k) or '' for k in _QUESTION_COMMENT_KEYS),
+                                _canon_answers(local_answers, extra_keys),
+                            )
+                            changed = current != wanted
+
+                        if changed:
+                            logger.debug("    Updating question: %s", q_name)
+                            to_update.append((existing_q, q_data))
+                    else:
+                        logger.info("    [green]Adding new question:[/green] %s", q_name)
+                        # Explicit position: concurrent creates can land in any order
+                        to_create.append(dict(q_data, position=position))
+
+                self._push_questions(quiz_obj, to_update, to_create)
+
+                # 3b. Cleanup remaining orphaned or duplicated items on Canvas
+                orphans = []
+                for q_name, items_list in existing_q_map.items():
+                    for existing_q in items_list:
+                        logger.info("    [red]Deleting orphaned question:[/red] %s", q_name)
+                        orphans.append(existing_q)
+                self._delete_questions(orphans)
+
+                if content_root and questions_rendered:
+                    save_mapped_id(content_root, file_path, quiz_obj.id, mtime=current_mtime, fingerprint=fingerprint,
+                                   questions_hash=questions_hash, question_hashes=question_hashes)
         else:
             # Smart Sync skipped update, but we already have quiz_obj
             pass
@@ -332,13 +506,57 @@ class QuizHandler(BaseHandler):
             }, indent=indent)
 
 
+    @classmethod
+    def _take_cached(cls, file_path):
+        """
+        Pop what can_handle() read for file_path as (text, parsed_json_or_None),
+        or None if nothing is cached or the file changed since.
+        """
+        hit = cls._parse_cache.pop(file_path, None)
+        if hit is None:
+            return None
+        try:
+            if os.stat(file_path).st_mtime_ns != hit[0]:
+                return None
+        except OSError:
+            return None
+        return hit[1], hit[2]
+
+    @staticmethod
+    def _push_questions(quiz_obj, to_update, to_create):
+        """
+        Sends question edits and creates concurrently. Each is an independent
+        request, so a quiz with many questions is no longer N serial round-trips.
+        """
+        jobs = [(existing_q.edit, q_data) for existing_q, q_data in to_update]
+        jobs += [(quiz_obj.create_question, q_data) for q_data in to_create]
+        if not jobs:
+            return
+        with ThreadPoolExecutor(max_workers=min(QUESTION_SYNC_WORKERS, len(jobs))) as pool:
+            list(pool.map(lambda job: canvas_retry(job[0], question=job[1]), jobs))
+
+    @staticmethod
+    def _delete_questions(questions):
+        """Deletes questions concurrently; a failed delete is logged, not raised."""
+        def delete(existing_q):
+            try:
+                canvas_retry(existing_q.delete)
+            except Exception as e:
+                logger.error("      Failed to delete question: %s", e)
+
+        if not questions:
+            return
+        with ThreadPoolExecutor(max_workers=min(QUESTION_SYNC_WORKERS, len(questions))) as pool:
+            list(pool.map(delete, questions))
+
     def _render_qmd_questions(self, questions_data, base_path, course, content_root):
         """
         Render markdown content in QMD quiz questions to HTML.
 
         Batches all markdown content into a single Quarto render for performance.
         Uses <div id="qchunk-N"> markers to split the rendered output back into
-        individual pieces.
+        individual pieces. Returns (questions, rendered); rendered is False when
+        any piece fell back to its unrendered markdown.
         """
         logger.debug("    Rendering %d questions through Quarto...", len(questions_data))
 
@@ -364,100 +582,43 @@ class QuizHandler(BaseHandler):
                     chunks.append((f"q{qi}_{comment_key}", q[comment_key]))
 
         if not chunks:
-            return questions_data
+            return questions_data, True
 
         # Step 2: Process images/links in all chunks
-        processed_chunks = {}
-        for key, md_text in chunks:
-            processed_chunks[key] = process_content(
-                md_text, base_path, course, content_root=content_root
-            )
+        processed_chunks = process_content_many(chunks, base_path, course, content_root=content_root)
 
-        # Step 3: Combine into a single QMD document with div markers
-        qmd_parts = ["---\ntitle: \"\"\n---\n"]
-        chunk_keys = list(processed_chunks.keys())
+        # Step 3: Combine the chunks Quarto would change into a single QMD document with div markers
+        chunk_keys = [key for key, text in processed_chunks.items() if self._needs_render(text)]
+        if not chunk_keys:
+            logger.debug("    Question content is already HTML, skipping Quarto")
+            return self._apply_rendered_chunks(questions_data, processed_chunks), True
 
-        for key in chunk_keys:
-            qmd_parts.append(f'\n\n::: {{#qchunk-{key}}}\n{processed_chunks[key]}\n:::\n')
+        qmd_content = self._build_chunk_document((key, processed_chunks[key]) for key in chunk_keys)
 
-        qmd_content = ''.join(qmd_parts)
-
-        # Step 4: Single Quarto render
-        temp_qmd = os.path.join(base_path, "_temp_quiz_render.qmd")
-        temp_html = os.path.join(base_path, "_temp_quiz_render.html")
-        temp_files_dir = os.path.join(base_path, "_temp_quiz_render_files")
-
-        rendered_map = {}
+        # Step 4: Single Quarto render (or cached result)
+        rendered_map = dict(processed_chunks)
+        rendered = False
 
         try:
-            with open(temp_qmd, 'w', encoding='utf-8') as f:
-                f.write(qmd_content)
-
-            cmd = ["quarto", "render", temp_qmd, "--to", "html"]
-            subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-            if os.path.exists(temp_html):
-                with open(temp_html, 'r', encoding='utf-8') as f:
-                    full_html = f.read()
-
-                # Extract main content
-                main_match = re.search(
-                    r'<main[^>]*id="quarto-document-content"[^>]*>(.*?)</main>',
-                    full_html, re.DOTALL
-                )
-                html_body = main_match.group(1) if main_match else full_html
-                html_body = re.sub(
-                    r'<header[^>]*id="title-block-header"[^>]*>.*?</header>',
-                    '', html_body, flags=re.DOTALL
-                )
-
-                # Step 5: Split by div markers
+            html_body = self._render_chunk_document(qmd_content, base_path, content_root)
+
+            if html_body is not None:
+                # Step 5: Split by div markers (one sweep over the body)
+                rendered_chunks = self._split_rendered_chunks(html_body)
+                rendered = all(key in rendered_chunks for key in chunk_keys)
                 for key in chunk_keys:
-                    pattern = rf'<div\s+id="qchunk-{re.escape(key)}"[^>]*>\s*(.*?)\s*</div>'
-                    match = re.search(pattern, html_body, re.DOTALL)
-                    if match:
-                        rendered_map[key] = match.group(1).strip()
-                    else:
-                        # Fallback: use processed markdown
-                        rendered_map[key] = processed_chunks[key]
+                    # Fallback: use processed markdown
+                    rendered_map[key] = rendered_chunks.get(key, processed_chunks[key])
             else:
                 logger.warning("    Quarto render produced no output, using processed markdown")
                 rendered_map = processed_chunks
 
         except Exception as e:
-            logger.warning("    Quarto render error: %s", e)
+            logger.warning("    Quarto render error: %s", self._render_error(e))
             rendered_map = processed_chunks
-        finally:
-            self._cleanup(temp_qmd, temp_html, temp_files_dir)
 
         # Step 6: Apply rendered HTML back to question data
-        rendered_questions = []
-        for qi, q in enumerate(questions_data):
-            q = dict(q)
-
-            text_key = f"q{qi}_text"
-            if text_key in rendered_map:
-                q['question_text'] = rendered_map[text_key]
-
-            if q.get('answers'):
-                rendered_answers = []
-                for ai, ans in enumerate(q['answers']):
-                    ans = dict(ans)
-                    ans_key = f"q{qi}_a{ai}"
-                    if ans_key in rendered_map:
-                        ans['answer_html'] = rendered_map[ans_key]
-                        ans.pop('answer_text', None)  # Use HTML version instead
-                    rendered_answers.append(ans)
-                q['answers'] = rendered_answers
-
-            for comment_key in ['correct_comments', 'incorrect_comments']:
-                ck = f"q{qi}_{comment_key}"
-                if ck in rendered_map:
-                    q[comment_key] = rendered_map[ck]
-
-            rendered_questions.append(q)
-
-        return rendered_questions
+        return self._apply_rendered_chunks(questions_data, rendered_map), rendered
 
     def _render_description_file(self, desc_file_path, course, content_root):
         """
@@ -475,7 +636,10 @@ class QuizHandler(BaseHandler):
 
         processed_content = process_content(raw_content, base_path, course, content_root=content_root)
 
-        html_body = self.render_quarto_document(processed_content, base_path, f"desc_{filename}", content_root=content_root)
+        # Cached on the processed description and the Quarto project config
+        # (_quarto.yml and the files it names), so a change to either re-renders
+        html_body = self.render_quarto_document(processed_content, base_path, f"desc_{filename}",
+                                                content_root=content_root, cache=True)
         if html_body is not None:
              return html_body.strip()
         return None
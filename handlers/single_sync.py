@@ -22,6 +22,7 @@ from handlers.content_utils import (
     is_valid_name,
     upload_file,
     FOLDER_FILES,
+    TitleIndex,
 )
 from handlers.study_guide_handler import StudyGuideHandler
 from handlers.page_handler import PageHandler
@@ -31,6 +32,9 @@ from handlers.new_quiz_handler import NewQuizHandler
 from handlers.subheader_handler import SubHeaderHandler
 from handlers.external_link_handler import ExternalLinkHandler
 
+# Modules by course and name, so each module directory doesn't cost a search request
+MODULE_INDEX = TitleIndex(lambda course, **params: course.get_modules(**params), title_attr='name')
+
 
 def build_handlers():
     """Return the standard ordered handler chain (shared by full and single sync)."""
@@ -47,14 +51,28 @@ def build_handlers():
 
 def find_or_create_module(course, module_name):
     """Find a Canvas module by name, creating it if missing. Returns the Module."""
-    modules = course.get_modules(search_term=module_name)
-    for m in modules:
-        if m.name == module_name:
-            logger.debug("  Found existing module: %s (ID: %s)", module_name, m.id)
-            return m
+    module = MODULE_INDEX.find(course, module_name)
+    if module is not None:
+        logger.debug("  Found existing module: %s (ID: %s)", module_name, module.id)
+        return module
 
     logger.info("  [green]Creating new module:[/green] %s", module_name)
-    return course.create_module(module={'name': module_name})
+    module = course.create_module(module={'name': module_name})
+    MODULE_INDEX.remember(course, module)
+    return module
+
+
+def reset_title_indexes():
+    """Forget the page, quiz and module title indexes.
+
+    They list the course once and are only kept current for what this process
+    creates, so each run starts from a fresh listing; otherwise a long-lived
+    caller (e.g. a GUI calling :func:`sync_single_file` repeatedly) would miss
+    changes made in Canvas in between, or keep finding deleted objects.
+    """
+    MODULE_INDEX.clear()
+    PageHandler._page_index.clear()
+    QuizHandler._quiz_index.clear()
 
 
 def compute_insert_position(module, module_dir, target_filename):
@@ -128,6 +146,7 @@ def sync_single_file(course, content_root, target_abs_path, canvas=None, handler
 
     if handlers is None:
         handlers = build_handlers()
+    reset_title_indexes()
 
     # Resolve the module from the parent directory.
     parent_dir = os.path.dirname(target_abs_path)
@@ -6,7 +6,7 @@ from handlers.base_handler import BaseHandler
 from handlers.content_utils import (
     process_content, upload_file, get_mapped_id, save_mapped_id,
     load_sync_map, save_sync_map, parse_module_name, safe_delete_file,
-    FOLDER_FILES, ACTIVE_ASSET_IDS
+    FOLDER_FILES, ACTIVE_ASSET_IDS, load_frontmatter_metadata, content_lock
 )
 from handlers.drift_detector import check_drift, store_canvas_hash
 from handlers.log import logger
@@ -27,8 +27,7 @@ class StudyGuideHandler(BaseHandler):
 
         # Match by frontmatter
         try:
-            post = frontmatter.load(file_path)
-            canvas_meta = post.metadata.get('canvas', {})
+            canvas_meta = load_frontmatter_metadata(file_path).get('canvas', {})
             return canvas_meta.get('type') == 'study_guide'
         except:
             return False
@@ -141,30 +140,31 @@ class StudyGuideHandler(BaseHandler):
                     else:
                         raise
             else:
-                # Title search fallback
-                pages = course.get_pages(search_term=title)
-                existing_item = None
-                for p in pages:
-                    if p.title == title:
-                        existing_item = p
-                        break
-
-                if existing_item:
-                    logger.info("    [yellow]Updating page:[/yellow] %s", title)
-                    logger.debug("    Matched by title search (ID: %s)", existing_item.page_id)
-                    try:
-                        existing_item.edit(**page_args)
-                    except BadRequest as e:
-                        if '"published"' in str(e):
-                            logger.warning("    Cannot change published state (page may be the course front page). Syncing content only.")
-                            page_args['wiki_page'].pop('published', None)
+                # Title search fallback (locked against a JIT stub for this file)
+                with content_lock(file_path):
+                    pages = course.get_pages(search_term=title)
+                    existing_item = None
+                    for p in pages:
+                        if p.title == title:
+                            existing_item = p
+                            break
+
+                    if existing_item:
+                        logger.info("    [yellow]Updating page:[/yellow] %s", title)
+                        logger.debug("    Matched by title search (ID: %s)", existing_item.page_id)
+                        try:
                             existing_item.edit(**page_args)
-                        else:
-                            raise
-                    page_obj = existing_item
-                else:
-                    logger.info("    [green]Creating page:[/green] %s", title)
-                    page_obj = course.create_page(**page_args)
+                        except BadRequest as e:
+                            if '"published"' in str(e):
+                                logger.warning("    Cannot change published state (page may be the course front page). Syncing content only.")
+                                page_args['wiki_page'].pop('published', None)
+                                existing_item.edit(**page_args)
+                            else:
+                                raise
+                        page_obj = existing_item
+                    else:
+                        logger.info("    [green]Creating page:[/green] %s", title)
+                        page_obj = course.create_page(**page_args)
 
             # 7. Upload PDF (rename to desired filename first)
             if pdf_path:
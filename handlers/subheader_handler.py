@@ -1,17 +1,21 @@
 import frontmatter
 import os
 from handlers.base_handler import BaseHandler
-from handlers.content_utils import parse_module_name
+from handlers.content_utils import parse_module_name, load_frontmatter_metadata, frontmatter_may_contain
 from handlers.log import logger
 
 class SubHeaderHandler(BaseHandler):
     def can_handle(self, file_path: str) -> bool:
         if not (file_path.endswith('.md') or file_path.endswith('.qmd')):
             return False
+        # Earlier handlers have already parsed (and cached) a .qmd file's
+        # frontmatter, but not a .md file's: skip the parse when the header
+        # cannot say subheader.
+        if file_path.endswith('.md') and not frontmatter_may_contain(file_path, b'subheader'):
+            return False
 
         try:
-            post = frontmatter.load(file_path)
-            canvas_meta = post.metadata.get('canvas', {})
+            canvas_meta = load_frontmatter_metadata(file_path).get('canvas', {})
             return canvas_meta.get('type') == 'subheader'
         except:
             return False
@@ -1,18 +1,120 @@
 import os
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from canvasapi import Canvas
 
 from handlers.log import logger, setup_logging
 from handlers.calendar_handler import CalendarHandler
 from handlers.subheader_handler import SubHeaderHandler
 from handlers.external_link_handler import ExternalLinkHandler
-from handlers.content_utils import upload_file, prune_orphaned_assets, FOLDER_FILES, parse_module_name, is_valid_name
-from handlers.single_sync import build_handlers, find_or_create_module, sync_single_file
+from handlers.base_handler import clear_render_cache
+from handlers.content_utils import upload_file, prune_orphaned_assets, FOLDER_FILES, parse_module_name, is_valid_name, SyncMap
+from handlers.single_sync import build_handlers, find_or_create_module, sync_single_file, reset_title_indexes
 from handlers import __version__
 from handlers.config import get_api_credentials, get_course_id
 from handlers.drift_detector import check_all_drift
 
 
+def _sync_module_file(file_path, handlers, course, module_obj, canvas, content_root):
+    """
+    Syncs one file of a module directory through the first handler that
+    claims it, or uploads it as a solo asset. Returns (module_item, synced).
+    """
+    filename = os.path.basename(file_path)
+
+    # Delegation Logic
+    for handler in handlers:
+        if handler.can_handle(file_path):
+            try:
+                return handler.sync(file_path, course, module_obj, canvas_obj=canvas, content_root=content_root), True
+            except Exception as e:
+                logger.exception("Failed to sync %s", filename)
+                return None, False
+
+    # Case C: Solo Asset (PDF, ZIP, etc) with NN_ prefix in Module
+    logger.info("  [yellow]Uploading file:[/yellow] %s", filename)
+
+    try:
+        # Upload to namespaced folder
+        file_url, file_id = upload_file(course, file_path, FOLDER_FILES, content_root=content_root)
+
+        if file_id and module_obj:
+            # Add to module as File item
+            mod_item = handlers[0].add_to_module(module_obj, {
+                'type': 'File',
+                'content_id': file_id,
+                'title': parse_module_name(filename),
+                'published': True
+            })
+            return mod_item, True
+    except Exception:
+        logger.exception("Failed to upload %s", filename)
+    return None, False
+
+
+def _start_module(item_path, module_obj, handlers, course, canvas, content_root, file_pool=None):
+    """
+    Starts syncing the files of one module directory, in file order. With a
+    `file_pool` the files are submitted to it and their futures returned;
+    otherwise they sync here and their (module_item, synced) results are
+    returned.
+    """
+    # Walk files inside the module
+    with os.scandir(item_path) as it:
+        module_files = sorted(e.path for e in it if not e.is_dir() and is_valid_name(e.name))
+
+    sync_args = (handlers, course, module_obj, canvas, content_root)
+    if file_pool:
+        return [file_pool.submit(_sync_module_file, f, *sync_args) for f in module_files]
+    return [_sync_module_file(f, *sync_args) for f in module_files]
+
+
+def _finish_module(results):
+    """
+    Puts the synced items of a module in file order, given its file results
+    from _start_module. Returns the number of synced items.
+    """
+    # Track synced items for reordering (results are in file order)
+    synced_module_items = [mod_item for mod_item, _ in results if mod_item]
+    item_count = sum(1 for _, synced in results if synced)
+
+    # Reorder Module Items (usually already in order, so check that first)
+    if synced_module_items and not all(m.position == i for i, m in enumerate(synced_module_items, start=1)):
+        logger.debug("  Fixing module item order (%d items)...", len(synced_module_items))
+        for i, mod_item in enumerate(synced_module_items):
+            expected_position = i + 1
+            if mod_item.position != expected_position:
+                logger.debug("    Moving '%s' to position %d (was %d)", mod_item.title, expected_position, mod_item.position)
+                try:
+                    mod_item.edit(module_item={'position': expected_position})
+                    mod_item.position = expected_position
+                except Exception as e:
+                    logger.error("  Failed to reorder item %s: %s", mod_item.title, e)
+    return item_count
+
+
+def _sync_root_file(file_path, handlers, course, canvas, content_root):
+    """Syncs a file outside any module. Returns True if a handler synced it."""
+    item = os.path.basename(file_path)
+
+    # Delegation Logic
+    for handler in handlers:
+        # Skip SubHeaders and ExternalLinks in root (doesn't make sense without a module)
+        if isinstance(handler, (SubHeaderHandler, ExternalLinkHandler)):
+            continue
+
+        if handler.can_handle(file_path):
+            logger.info("[cyan]Syncing root item:[/cyan] %s", item)
+            try:
+                # Pass module=None
+                handler.sync(file_path, course, module=None, canvas_obj=canvas, content_root=content_root)
+                return True
+            except Exception as e:
+                logger.exception("Failed to sync root item %s", item)
+            return False
+    return False
+
+
 def main():
     parser = argparse.ArgumentParser(description="Sync local content to Canvas.")
     parser.add_argument("--version", action="version", version=f"CanvasQuartoSync {__version__}")
@@ -23,6 +125,7 @@ def main():
     parser.add_argument("--check-drift", action="store_true", help="Check if Canvas content was modified outside sync (no sync performed).")
     parser.add_argument("--show-diff", action="store_true", help="Show full diff when using --check-drift.")
     parser.add_argument("--only", help="Sync only a specific file (relative path from content dir, e.g. '01_Intro/02_Welcome.qmd').")
+    parser.add_argument("--workers", type=int, default=1, help="Sync up to N files at a time, across modules (default: 1).")
 
     verbosity = parser.add_mutually_exclusive_group()
     verbosity.add_argument("--verbose", "-v", action="store_true", help="Show detailed debug output.")
@@ -41,6 +144,7 @@ def main():
         return
 
     logger.info("Target content directory: [dim]%s[/dim]", content_root)
+    reset_title_indexes()
 
     # Force re-render: delete sync map to clear cached mtimes
     if args.force:
@@ -48,6 +152,7 @@ def main():
         if os.path.exists(sync_map_path):
             os.remove(sync_map_path)
             logger.info("[yellow]Force mode:[/yellow] cleared sync map, all files will re-render")
+        clear_render_cache(content_root)
 
     # Resolve Context
     API_URL, API_TOKEN = get_api_credentials(content_root)
@@ -101,7 +206,8 @@ def main():
         candidate = os.path.abspath(os.path.join(content_root, args.only))
         if not os.path.exists(candidate):
             candidate = os.path.abspath(args.only)
-        result = sync_single_file(course, content_root, candidate, canvas=canvas, handlers=handlers)
+        with SyncMap(content_root):
+            result = sync_single_file(course, content_root, candidate, canvas=canvas, handlers=handlers)
         if result.success:
             logger.info("[bold green]%s[/bold green]", result.message)
         else:
@@ -124,116 +230,72 @@ def main():
 
     logger.info("[bold cyan]Starting content sync...[/bold cyan]")
 
-    # 1. Walk the directory
-    # Sort ensure robust ordering
-    items = sorted(os.listdir(content_root))
+    # All handlers share one in-memory sync map; it is written once at the end.
+    with SyncMap(content_root):
+        # 1. Walk the directory
+        # Sort ensure robust ordering. scandir entries answer is_dir()/is_file()
+        # from the directory listing, without a stat per entry.
+        with os.scandir(content_root) as it:
+            entries = sorted(it, key=lambda e: e.name)
 
-    module_count = 0
-    item_count = 0
+        module_count = 0
+        item_count = 0
 
-    for item in items:
-        item_path = os.path.join(content_root, item)
+        # With --workers N, the files of all modules and the root share one
+        # pool of N threads. Modules are still found or created, and their
+        # items reordered, here in folder order.
+        file_pool = ThreadPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+        module_jobs = []
+        root_jobs = []
 
-        # Case A: Module Directory
-        if os.path.isdir(item_path):
-            if not is_valid_name(item):
-                continue
-
-            # This is a Module directory
-            module_name = parse_module_name(item)
-            logger.info("[cyan]Processing module:[/cyan] [bold]%s[/bold]", module_name)
-            module_count += 1
-
-            # Find or Create Module in Canvas
-            try:
-                module_obj = find_or_create_module(course, module_name)
-
-                # Walk files inside the module
-                module_files = sorted(os.listdir(item_path))
-
-                # Track synced items for reordering
-                synced_module_items = []
-
-                for filename in module_files:
-                    file_path = os.path.join(item_path, filename)
-
-                    if os.path.isdir(file_path):
-                        continue
+        try:
+            for entry in entries:
+                item = entry.name
+                item_path = entry.path
 
-                    if not is_valid_name(filename):
+                # Case A: Module Directory
+                if entry.is_dir():
+                    if not is_valid_name(item):
                         continue
 
-                    # Delegation Logic
-                    handled = False
-                    for handler in handlers:
-                        if handler.can_handle(file_path):
-                            try:
-                                mod_item = handler.sync(file_path, course, module_obj, canvas_obj=canvas, content_root=content_root)
-                                if mod_item:
-                                    synced_module_items.append(mod_item)
-                                item_count += 1
-                            except Exception as e:
-                                logger.exception("Failed to sync %s", filename)
-                            handled = True
-                            break
-
-                    if not handled:
-                        # Case C: Solo Asset (PDF, ZIP, etc) with NN_ prefix in Module
-                        logger.info("  [yellow]Uploading file:[/yellow] %s", filename)
-
-                        # Upload to namespaced folder
-                        file_url, file_id = upload_file(course, file_path, FOLDER_FILES, content_root=content_root)
-
-                        if file_id and module_obj:
-                            # Add to module as File item
-                            mod_item = handlers[0].add_to_module(module_obj, {
-                                'type': 'File',
-                                'content_id': file_id,
-                                'title': parse_module_name(filename),
-                                'published': True
-                            })
-                            if mod_item:
-                                synced_module_items.append(mod_item)
-                            item_count += 1
-
-                # Reorder Module Items
-                if synced_module_items:
-                    logger.debug("  Verifying module item order (%d items)...", len(synced_module_items))
-                    for i, mod_item in enumerate(synced_module_items):
-                        expected_position = i + 1
-                        if mod_item.position != expected_position:
-                            logger.debug("    Moving '%s' to position %d (was %d)", mod_item.title, expected_position, mod_item.position)
-                            try:
-                                mod_item.edit(module_item={'position': expected_position})
-                                mod_item.position = expected_position
-                            except Exception as e:
-                                logger.error("  Failed to reorder item %s: %s", mod_item.title, e)
+                    # This is a Module directory
+                    module_name = parse_module_name(item)
+                    logger.info("[cyan]Processing module:[/cyan] [bold]%s[/bold]", module_name)
+                    module_count += 1
 
-            except Exception as e:
-                 logger.error("Failed to process module %s: %s", module_name, e)
-
-        # Case B: Root File (No Module)
-        elif os.path.isfile(item_path):
-             if not is_valid_name(item):
-                 continue
-
-             # Delegation Logic
-             handled = False
-             for handler in handlers:
-                # Skip SubHeaders and ExternalLinks in root (doesn't make sense without a module)
-                if isinstance(handler, (SubHeaderHandler, ExternalLinkHandler)):
-                    continue
-
-                if handler.can_handle(item_path):
-                    logger.info("[cyan]Syncing root item:[/cyan] %s", item)
+                    # Find or Create Module in Canvas
                     try:
-                        # Pass module=None
-                        handler.sync(item_path, course, module=None, canvas_obj=canvas, content_root=content_root)
-                        item_count += 1
+                        module_obj = find_or_create_module(course, module_name)
+                        results = _start_module(item_path, module_obj, handlers, course, canvas, content_root, file_pool)
                     except Exception as e:
-                        logger.exception("Failed to sync root item %s", item)
-                    handled = True
-                    break
+                         logger.error("Failed to process module %s: %s", module_name, e)
+                         continue
+
+                    if file_pool:
+                        module_jobs.append(results)
+                    else:
+                        item_count += _finish_module(results)
+
+                # Case B: Root File (No Module)
+                elif entry.is_file():
+                     if not is_valid_name(item):
+                         continue
+
+                     job = (item_path, handlers, course, canvas, content_root)
+                     if file_pool:
+                         root_jobs.append(file_pool.submit(_sync_root_file, *job))
+                     else:
+                         item_count += _sync_root_file(*job)
+
+            if file_pool:
+                for futures in module_jobs:
+                    item_count += _finish_module([future.result() for future in futures])
+                item_count += sum(future.result() for future in root_jobs)
+        finally:
+            # Also on Ctrl-C or an error: queued files are dropped instead of
+            # syncing on after the run has given up
+            if file_pool:
+                file_pool.shutdown(cancel_futures=True)
 
     # 3. Cleanup Orphans
     prune_orphaned_assets(course)
@@ -28,12 +28,20 @@ def pytest_addoption(parser):
 @pytest.fixture(autouse=True)
 def reset_globals():
     """Clear module-level caches between tests to prevent cross-contamination."""
-    from handlers.content_utils import FOLDER_CACHE, ACTIVE_ASSET_IDS
+    from handlers.content_utils import FOLDER_CACHE, ACTIVE_ASSET_IDS, FRONTMATTER_CACHE
     from handlers.config import _config_cache
+    from handlers.page_handler import PageHandler
+    from handlers.quiz_handler import QuizHandler
+    from handlers.single_sync import MODULE_INDEX
 
     FOLDER_CACHE.clear()
     ACTIVE_ASSET_IDS.clear()
+    FRONTMATTER_CACHE.clear()
     _config_cache.clear()
+    PageHandler._page_index.clear()
+    QuizHandler._quiz_index.clear()
+    QuizHandler._parse_cache.clear()
+    MODULE_INDEX.clear()
     yield
 
 
@@ -41,3 +49,25 @@ def reset_globals():
 def fixtures_dir():
     """Return the path to the tests/fixtures/ directory."""
     return os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+@pytest.fixture
+def make_listed_course():
+    """Factory for a mocked course whose `get_<kind>()` listing returns `listed`
+    and whose title search finds `searchable` (objects created after the listing)."""
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    def make(kind, listed, searchable=(), title_attr="title"):
+        course = MagicMock()
+        course.id = 101
+
+        def get_items(search_term=None, **kwargs):
+            if search_term is None:
+                return [SimpleNamespace(**{title_attr: t}) for t in listed]
+            return [SimpleNamespace(**{title_attr: t}) for t in searchable if search_term in t]
+
+        getattr(course, f"get_{kind}").side_effect = get_items
+        return course
+
+    return make
@@ -0,0 +1,47 @@
+"""Tests for AssignmentHandler's group set prompt under concurrent syncs."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import builtins
+
+from handlers.assignment_handler import AssignmentHandler
+
+
+def _course(*names):
+    course = MagicMock()
+    course.get_group_categories.return_value = [SimpleNamespace(name=n, id=i) for i, n in enumerate(names, 1)]
+    return course
+
+
+class TestGroupSetPrompt:
+
+    def test_concurrent_prompts_do_not_interleave(self, monkeypatch):
+        """The second file reuses the first one's "apply to all" answer instead of prompting."""
+        answers = iter(["Labs", "y"])
+        active, overlaps, lock = [0], [0], threading.Lock()
+
+        def fake_input(prompt):
+            with lock:
+                active[0] += 1
+                overlaps[0] = max(overlaps[0], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+                return next(answers)
+
+        monkeypatch.setattr(builtins, "input", fake_input)
+        monkeypatch.setattr(AssignmentHandler, "_write_group_set_to_frontmatter", staticmethod(lambda *a: None))
+        handler = AssignmentHandler()
+        course = _course("Labs", "Projects")
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            ids = list(pool.map(
+                lambda p: handler._resolve_group_set(course, p, MagicMock(), {}, True, None),
+                ["01_A.qmd", "02_B.qmd"]))
+
+        assert ids == [1, 1]
+        assert overlaps[0] == 1
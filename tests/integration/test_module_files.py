@@ -0,0 +1,131 @@
+"""Tests for per-file module sync in sync_to_canvas with mocked handlers."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import sync_to_canvas
+from sync_to_canvas import _finish_module, _start_module, _sync_module_file, _sync_root_file
+
+
+class _Handler:
+    def __init__(self, claims, result=None, error=None):
+        self.claims = claims
+        self.result = result
+        self.error = error
+        self.synced = []
+
+    def can_handle(self, file_path):
+        return file_path.endswith(self.claims)
+
+    def sync(self, file_path, course, module=None, canvas_obj=None, content_root=None):
+        self.synced.append(file_path)
+        if self.error:
+            raise self.error
+        return self.result
+
+
+class TestSyncModuleFile:
+
+    def test_first_claiming_handler_syncs(self, tmp_path):
+        item = MagicMock()
+        first, second = _Handler(".qmd", item), _Handler(".qmd")
+        result = _sync_module_file(str(tmp_path / "01_A.qmd"), [first, second], MagicMock(), MagicMock(), None, str(tmp_path))
+        assert result == (item, True)
+        assert second.synced == []
+
+    def test_failed_sync_is_not_counted(self, tmp_path):
+        handler = _Handler(".qmd", error=RuntimeError("boom"))
+        result = _sync_module_file(str(tmp_path / "01_A.qmd"), [handler], MagicMock(), MagicMock(), None, str(tmp_path))
+        assert result == (None, False)
+
+    def test_unclaimed_file_is_uploaded_as_module_file(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(sync_to_canvas, "upload_file", lambda *a, **k: ("http://x/file", 7))
+        handler = _Handler(".qmd")
+        item = MagicMock()
+        handler.add_to_module = MagicMock(return_value=item)
+        result = _sync_module_file(str(tmp_path / "02_Notes.pdf"), [handler], MagicMock(), MagicMock(), None, str(tmp_path))
+        assert result == (item, True)
+        assert handler.add_to_module.call_args[0][1]["content_id"] == 7
+
+    def test_results_keep_file_order_when_pooled(self, tmp_path):
+        handler = _Handler(".qmd")
+        handler.sync = lambda file_path, *a, **k: file_path
+        names = [f"{i:02d}_F.qmd" for i in range(1, 9)]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(
+                lambda n: _sync_module_file(str(tmp_path / n), [handler], MagicMock(), MagicMock(), None, str(tmp_path)),
+                names))
+        assert [item for item, _ in results] == [str(tmp_path / n) for n in names]
+
+
+class TestStartModule:
+
+    def _module_dir(self, tmp_path, names):
+        mod_dir = tmp_path / "01_Mod"
+        mod_dir.mkdir()
+        for name in names:
+            (mod_dir / name).write_text("x", encoding="utf-8")
+        (mod_dir / "notes.txt").write_text("not synced", encoding="utf-8")
+        return mod_dir
+
+    def test_syncs_valid_files_in_order(self, tmp_path):
+        mod_dir = self._module_dir(tmp_path, ["02_B.qmd", "01_A.qmd"])
+        handler = _Handler(".qmd", result="item")
+        results = _start_module(str(mod_dir), MagicMock(), [handler], MagicMock(), None, str(tmp_path))
+        assert results == [("item", True), ("item", True)]
+        assert handler.synced == [str(mod_dir / "01_A.qmd"), str(mod_dir / "02_B.qmd")]
+
+    def test_pooled_files_share_the_pool(self, tmp_path):
+        mod_dir = self._module_dir(tmp_path, [f"{i:02d}_F.qmd" for i in range(1, 7)])
+        active, peak, lock = [0], [0], threading.Lock()
+
+        def sync(file_path, *a, **k):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+            return file_path
+
+        handler = _Handler(".qmd")
+        handler.sync = sync
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = _start_module(str(mod_dir), MagicMock(), [handler], MagicMock(), None, str(tmp_path), pool)
+            results = [future.result() for future in futures]
+        assert [item for item, _ in results] == [str(mod_dir / f"{i:02d}_F.qmd") for i in range(1, 7)]
+        assert peak[0] == 2
+
+
+class TestFinishModule:
+
+    def test_items_are_moved_into_file_order(self):
+        first, second = MagicMock(position=2), MagicMock(position=1)
+        assert _finish_module([(first, True), (None, False), (second, True)]) == 2
+        first.edit.assert_called_once_with(module_item={"position": 1})
+        second.edit.assert_called_once_with(module_item={"position": 2})
+
+    def test_items_in_order_are_not_edited(self):
+        items = [MagicMock(position=1), MagicMock(position=2)]
+        assert _finish_module([(item, True) for item in items]) == 2
+        for item in items:
+            item.edit.assert_not_called()
+
+
+class TestSyncRootFile:
+
+    def test_module_only_handlers_are_skipped(self, tmp_path, monkeypatch):
+        subheader = _Handler(".qmd")
+        monkeypatch.setattr(sync_to_canvas, "SubHeaderHandler", _Handler)
+        page = MagicMock()
+        page.can_handle.return_value = True
+        assert _sync_root_file(str(tmp_path / "01_Home.qmd"), [subheader, page], MagicMock(), None, str(tmp_path)) is True
+        assert subheader.synced == []
+        assert page.sync.call_args.kwargs["module"] is None
+
+    def test_failed_sync_is_not_counted(self, tmp_path):
+        page = MagicMock()
+        page.sync.side_effect = RuntimeError("boom")
+        assert _sync_root_file(str(tmp_path / "01_Home.qmd"), [page], MagicMock(), None, str(tmp_path)) is False
@@ -0,0 +1,41 @@
+"""Tests for PageHandler's unchanged-file skip path with a mocked Canvas course."""
+
+import os
+from unittest.mock import MagicMock
+
+import handlers.page_handler as page_handler
+from handlers.content_utils import save_mapped_id
+from handlers.page_handler import PageHandler
+
+
+def _synced_page(tmp_path, monkeypatch, front_matter="canvas:\n  type: page"):
+    """Write a page and record it as already synced at its current mtime."""
+    path = tmp_path / "01_Home.qmd"
+    path.write_text(f"---\n{front_matter}\n---\nBody", encoding="utf-8")
+    save_mapped_id(str(tmp_path), str(path), "home", mtime=os.path.getmtime(path))
+    monkeypatch.setattr(page_handler, "process_content", lambda content, *a, **k: content)
+    return str(path)
+
+
+class TestUnchangedPageSkip:
+
+    def test_root_page_needs_no_canvas_request(self, tmp_path, monkeypatch):
+        path = _synced_page(tmp_path, monkeypatch)
+        course = MagicMock()
+        assert PageHandler().sync(path, course, module=None, content_root=str(tmp_path)) is None
+        course.get_page.assert_not_called()
+
+    def test_module_page_still_fetched_for_placement(self, tmp_path, monkeypatch):
+        path = _synced_page(tmp_path, monkeypatch)
+        course = MagicMock()
+        module = MagicMock()
+        module.get_module_items.return_value = []
+        PageHandler().sync(path, course, module=module, content_root=str(tmp_path))
+        course.get_page.assert_called_once_with("home")
+
+    def test_front_page_still_reasserted(self, tmp_path, monkeypatch):
+        path = _synced_page(tmp_path, monkeypatch, "canvas:\n  type: page\n  front_page: true")
+        course = MagicMock()
+        PageHandler().sync(path, course, module=None, content_root=str(tmp_path))
+        course.get_page.assert_called_once_with("home")
+        course.get_page.return_value.edit.assert_called_once_with(wiki_page={'front_page': True})
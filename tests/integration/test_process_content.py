@@ -148,3 +148,41 @@ def test_http_links_not_processed(mock_resolve, mock_upload):
     mock_upload.assert_not_called()
     mock_resolve.assert_not_called()
     assert "https://canvas.instructure.com" in result
+
+
+@patch("handlers.content_utils.upload_file")
+def test_process_content_many_keeps_order(mock_upload):
+    """Chunks are processed concurrently but returned keyed in input order."""
+    from handlers.content_utils import process_content_many
+    mock_upload.side_effect = lambda course, path, *a, **k: (f"https://canvas.com/{os.path.basename(path)}", 1)
+    chunks = [(f"q{i}", f"![x](img{i}.png)") for i in range(12)]
+    result = process_content_many(chunks, "/base", MagicMock())
+    assert list(result) == [key for key, _ in chunks]
+    assert result["q7"] == "![x](https://canvas.com/img7.png)"
+
+
+def test_concurrent_uploads_create_folder_once(tmp_path):
+    """Threads racing on a missing folder create it once."""
+    import threading
+    from handlers.content_utils import get_or_create_folder
+    course = MagicMock()
+    course.get_folders.return_value = []
+    created = []
+    gate = threading.Barrier(4)
+
+    def create_folder(name, **kwargs):
+        created.append(name)
+        folder = MagicMock()
+        folder.name = name
+        return folder
+    course.create_folder.side_effect = create_folder
+
+    def worker():
+        gate.wait()
+        get_or_create_folder(course, "course_files")
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert created == ["course_files"]
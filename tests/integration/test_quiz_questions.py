@@ -0,0 +1,405 @@
+"""Tests for QuizHandler's question push with mocked Canvas objects."""
+
+import json
+import os
+from unittest.mock import MagicMock
+
+from canvasapi.exceptions import RateLimitExceeded
+
+import handlers.content_utils as content_utils
+import handlers.quiz_handler as quiz_handler
+from handlers.content_utils import get_mapped_id, save_mapped_id
+from handlers.quiz_handler import (
+    QuizHandler, _canon_answers, _answer_extra_keys, _questions_hash, _question_hashes, _files_fingerprint,
+)
+
+
+class TestPushQuestions:
+
+    def test_sends_every_edit_and_create(self):
+        quiz = MagicMock()
+        existing = [MagicMock() for _ in range(3)]
+        to_update = [(q, {"question_name": f"U{i}"}) for i, q in enumerate(existing)]
+        to_create = [{"question_name": f"C{i}", "position": i + 4} for i in range(5)]
+
+        QuizHandler._push_questions(quiz, to_update, to_create)
+
+        for q, data in to_update:
+            q.edit.assert_called_once_with(question=data)
+        created = sorted(c.kwargs["question"]["position"] for c in quiz.create_question.call_args_list)
+        assert created == [4, 5, 6, 7, 8]
+
+    def test_nothing_to_do(self):
+        quiz = MagicMock()
+        QuizHandler._push_questions(quiz, [], [])
+        quiz.create_question.assert_not_called()
+
+    def test_rate_limited_request_is_retried(self, monkeypatch):
+        monkeypatch.setattr(content_utils.time, "sleep", lambda s: None)
+        quiz = MagicMock()
+        quiz.create_question.side_effect = [RateLimitExceeded("429"), MagicMock()]
+        QuizHandler._push_questions(quiz, [], [{"question_name": "Q", "position": 1}])
+        assert quiz.create_question.call_count == 2
+
+
+class TestDeleteQuestions:
+
+    def test_deletes_every_question(self):
+        orphans = [MagicMock() for _ in range(5)]
+        QuizHandler._delete_questions(orphans)
+        for q in orphans:
+            q.delete.assert_called_once_with()
+
+    def test_failed_delete_does_not_stop_the_rest(self):
+        failing, ok = MagicMock(), MagicMock()
+        failing.delete.side_effect = RuntimeError("gone")
+        QuizHandler._delete_questions([failing, ok])
+        ok.delete.assert_called_once_with()
+
+
+class TestCanonAnswers:
+
+    def test_canvas_and_local_shapes_compare_equal(self):
+        local = [{"answer_html": "<p>A</p>", "answer_weight": 100, "answer_comments": "Yes"},
+                 {"answer_text": "B", "answer_weight": 0}]
+        remote = [{"id": 1, "text": "A", "html": "<p>A</p>", "weight": 100.0, "comments": "Yes"},
+                  {"id": 2, "text": "B", "html": "", "weight": 0.0, "comments": ""}]
+        assert _canon_answers(remote) == _canon_answers(local)
+
+    def test_changed_weight_differs(self):
+        local = [{"answer_text": "A", "answer_weight": 0}]
+        remote = [{"id": 1, "text": "A", "weight": 100.0}]
+        assert _canon_answers(remote) != _canon_answers(local)
+
+    def test_missing_answers_compare_as_empty(self):
+        assert _canon_answers(None) == _canon_answers([]) == ()
+        assert _answer_extra_keys(None) == ()
+
+    def test_pass_through_fields_are_compared(self):
+        local = [{"answer_weight": 100, "numerical_answer_type": "exact_answer", "exact": 5, "margin": 1}]
+        keys = _answer_extra_keys(local)
+        assert keys == ("exact", "margin", "numerical_answer_type")
+        same = [{"id": 1, "weight": 100.0, "numerical_answer_type": "exact_answer", "exact": 5.0, "margin": 1.0}]
+        moved = [{"id": 1, "weight": 100.0, "numerical_answer_type": "exact_answer", "exact": 6.0, "margin": 1.0}]
+        assert _canon_answers(same, keys) == _canon_answers(local, keys)
+        assert _canon_answers(moved, keys) != _canon_answers(local, keys)
+
+
+def _json_quiz(tmp_path, questions):
+    path = tmp_path / "01_Quiz.json"
+    path.write_text(json.dumps({"canvas": {"title": "Quiz"}, "questions": questions}), encoding="utf-8")
+    return str(path)
+
+
+def _config(tmp_path):
+    """The Quarto setup a quiz in tmp_path is hashed with."""
+    return quiz_handler._render_config_fingerprint(str(tmp_path), str(tmp_path))
+
+
+def _stub_rendering(monkeypatch):
+    monkeypatch.setattr(quiz_handler, "process_content", lambda content, *a, **k: content)
+    monkeypatch.setattr(QuizHandler, "_render_qmd_questions", lambda self, q, *a, **k: (q, True))
+
+
+class TestQuizSettings:
+
+    def test_payload_copies_settings_and_clears_missing_dates(self, tmp_path, monkeypatch):
+        _stub_rendering(monkeypatch)
+        path = tmp_path / "01_Quiz.json"
+        canvas = {"title": "Quiz", "due_at": "2026-01-01T00:00:00Z", "time_limit": 30,
+                  "shuffle_answers": True, "description": "<p>Hi</p>"}
+        path.write_text(json.dumps({"canvas": canvas, "questions": []}), encoding="utf-8")
+        course = MagicMock()
+        course.get_quizzes.return_value = []
+        course.create_quiz.return_value.get_questions.return_value = []
+
+        QuizHandler().sync(str(path), course, canvas_obj=MagicMock(), content_root=str(tmp_path))
+
+        payload = course.create_quiz.call_args.kwargs["quiz"]
+        assert payload["due_at"] == "2026-01-01T00:00:00Z"
+        assert payload["unlock_at"] == "" and payload["lock_at"] == ""
+        assert payload["time_limit"] == 30 and payload["shuffle_answers"] is True
+        assert payload["description"] == "<p>Hi</p>"
+        assert "access_code" not in payload
+
+
+    def _update(self, tmp_path, monkeypatch, fail_first_with=None):
+        """Sync a mapped quiz; returns the `published` value sent by each quiz edit."""
+        _stub_rendering(monkeypatch)
+        path = _json_quiz(tmp_path, [])
+        save_mapped_id(str(tmp_path), path, 5, mtime=0)
+        course = MagicMock()
+        quiz = course.get_quiz.return_value
+        quiz.id = 5
+        quiz.get_questions.return_value = []
+        sent = []
+
+        def edit(quiz):
+            sent.append(quiz["published"])
+            if fail_first_with and len(sent) == 1:
+                raise Exception(fail_first_with)
+
+        quiz.edit.side_effect = edit
+        QuizHandler().sync(path, course, canvas_obj=MagicMock(), content_root=str(tmp_path))
+        return sent
+
+    def test_update_unpublishes_with_settings_in_one_edit(self, tmp_path, monkeypatch):
+        # Settings edit in draft mode, then the final save
+        assert self._update(tmp_path, monkeypatch) == [False, False]
+
+    def test_quiz_with_submissions_is_updated_while_published(self, tmp_path, monkeypatch):
+        sent = self._update(tmp_path, monkeypatch, "Can't unpublish if there are student submissions")
+        # No final save: Canvas needs a manual 'Save It Now' for quizzes with submissions
+        assert sent == [False, True]
+
+
+class TestCreateRace:
+
+    def test_stub_created_after_title_lookup_is_adopted(self, tmp_path, monkeypatch):
+        """A JIT stub made by another worker between lookup and create is found under content_lock."""
+        _stub_rendering(monkeypatch)
+        path = _json_quiz(tmp_path, [])
+        stub = MagicMock(title="Quiz")
+        stub.get_questions.return_value = []
+        searches = []
+
+        def get_quizzes(search_term=None, **kwargs):
+            if search_term is None:
+                return []
+            searches.append(search_term)
+            return [stub] if len(searches) > 1 else []
+
+        course = MagicMock()
+        course.get_quizzes.side_effect = get_quizzes
+        QuizHandler().sync(path, course, canvas_obj=MagicMock(), content_root=str(tmp_path))
+
+        course.create_quiz.assert_not_called()
+        stub.edit.assert_called()
+
+
+class TestRenderQuestions:
+
+    def _render(self, monkeypatch, questions):
+        documents = []
+        monkeypatch.setattr(quiz_handler, "process_content_many", lambda chunks, *a, **k: dict(chunks))
+
+        def render(self, qmd_content, base_path, content_root=None):
+            documents.append(qmd_content)
+            return '<div id="qchunk-q0_text"><p><em>Hi</em></p></div>'
+
+        monkeypatch.setattr(QuizHandler, "_render_chunk_document", render)
+        rendered, _ = QuizHandler()._render_qmd_questions(questions, "base", MagicMock(), None)
+        return rendered, documents
+
+    def test_html_questions_skip_quarto(self, monkeypatch):
+        questions = [{"question_text": "<p>Hi</p>", "answers": [{"answer_html": "<p>A</p>"}]}]
+        rendered, documents = self._render(monkeypatch, questions)
+        assert documents == []
+        assert rendered[0] is questions[0]
+
+    def test_only_markdown_chunks_are_rendered(self, monkeypatch):
+        questions = [{"question_text": "*Hi*", "answers": [{"answer_html": "<p>A</p>"}]}]
+        rendered, documents = self._render(monkeypatch, questions)
+        assert "qchunk-q0_text" in documents[0] and "qchunk-q0_a0" not in documents[0]
+        assert rendered[0]["question_text"] == "<p><em>Hi</em></p>"
+        assert rendered[0]["answers"][0] == {"answer_html": "<p>A</p>"}
+
+    def test_render_fallback_is_reported(self, monkeypatch):
+        monkeypatch.setattr(quiz_handler, "process_content_many", lambda chunks, *a, **k: dict(chunks))
+        monkeypatch.setattr(QuizHandler, "_render_chunk_document", lambda self, *a, **k: None)
+        questions = [{"question_text": "*Hi*", "answers": []}]
+        rendered, fully_rendered = QuizHandler()._render_qmd_questions(questions, "base", MagicMock(), None)
+        assert rendered[0]["question_text"] == "*Hi*"
+        assert fully_rendered is False
+
+
+class TestQuestionsHashSkip:
+
+    QUESTIONS = [{"question_name": "Q1", "question_text": "What?", "answers": []}]
+
+    def test_unchanged_questions_skip_download(self, tmp_path, monkeypatch):
+        _stub_rendering(monkeypatch)
+        path = _json_quiz(tmp_path, self.QUESTIONS)
+        # Stale mtime forces a settings update; the questions hash still matches
+        save_mapped_id(str(tmp_path), path, 5, mtime=0, questions_hash=_questions_hash(self.QUESTIONS, _config(tmp_path)))
+        course = MagicMock()
+        course.get_quiz.return_value.id = 5
+
+        QuizHandler().sync(path, course, canvas_obj=MagicMock(), content_root=str(tmp_path))
+
+        course.get_quiz.assert_called_once_with(5)
+        course.get_quiz.return_value.get_questions.assert_not_called()
+        _, entry = get_mapped_id(str(tmp_path), path)
+        assert entry["questions_hash"] == _questions_hash(self.QUESTIONS, _config(tmp_path))
+
+    def test_changed_questions_are_synced_and_hash_stored(self, tmp_path, monkeypatch):
+        _stub_rendering(monkeypatch)
+        path = _json_quiz(tmp_path, self.QUESTIONS)
+        save_mapped_id(str(tmp_path), path, 5, mtime=0, questions_hash="stale")
+        course = MagicMock()
+        quiz = course.get_quiz.return_value
+        quiz.id = 5
+        quiz.get_questions.return_value = []
+
+        QuizHandler().sync(path, course, canvas_obj=MagicMock(), content_root=str(tmp_path))
+
+        quiz.get_questions.assert_called_once_with(per_page=100)
+        quiz.create_question.assert_called_once()
+        _, entry = get_mapped_id(str(tmp_path), path)
+        assert entry["questions_hash"] == _questions_hash(self.QUESTIONS, _config(tmp_path))
+
+
+    def test_hashes_are_not_stored_after_render_fallback(self, tmp_path, monkeypatch):
+        _stub_rendering(monkeypatch)
+        monkeypatch.setattr(QuizHandler, "_render_qmd_questions", lambda self, q, *a, **k: (q, False))
+        path = _json_quiz(tmp_path, self.QUESTIONS)
+        save_mapped_id(str(tmp_path), path, 5, mtime=0, questions_hash="stale")
+        course = MagicMock()
+        course.get_quiz.return_value.id = 5
+        course.get_quiz.return_value.get_questions.return_value = []
+
+        QuizHandler().sync(path, course, canvas_obj=MagicMock(), content_root=str(tmp_path))
+
+        course.get_quiz.return_value.create_question.assert_called_once()
+        _, entry = get_mapped_id(str(tmp_path), path)
+        assert "questions_hash" not in entry and "question_hashes" not in entry
+
+    def test_quarto_config_edit_resyncs_questions(self, tmp_path, monkeypatch):
+        _stub_rendering(monkeypatch)
+        path = _json_quiz(tmp_path, self.QUESTIONS)
+        save_mapped_id(str(tmp_path), path, 5, mtime=0, questions_hash=_questions_hash(self.QUESTIONS, _config(tmp_path)))
+        (tmp_path / "_quarto.yml").write_text("format: html\n", encoding="utf-8")
+        course = MagicMock()
+        course.get_quiz.return_value.id = 5
+        course.get_quiz.return_value.get_questions.return_value = []
+
+        QuizHandler().sync(path, course, canvas_obj=MagicMock(), content_root=str(tmp_path))
+
+        course.get_quiz.return_value.get_questions.assert_called_once()
+
+
+class TestQuestionDiff:
+
+    QUESTIONS = [{"question_name": "Q1", "question_text": "What?", "question_type": "multiple_choice_question",
+                  "points_possible": 1, "answers": [{"answer_text": "A", "answer_weight": 100}]}]
+
+    def _sync(self, tmp_path, monkeypatch, remote, **map_extra):
+        _stub_rendering(monkeypatch)
+        path = _json_quiz(tmp_path, self.QUESTIONS)
+        save_mapped_id(str(tmp_path), path, 5, mtime=0, **map_extra)
+        course = MagicMock()
+        quiz = course.get_quiz.return_value
+        quiz.id = 5
+        quiz.get_questions.return_value = [remote]
+        QuizHandler().sync(path, course, canvas_obj=MagicMock(), content_root=str(tmp_path))
+        return quiz
+
+    def _remote(self, **overrides):
+        fields = dict(question_name="Q1", question_text="What?", question_type="multiple_choice_question",
+                      points_possible=1.0, answers=[{"id": 7, "text": "A", "html": "", "weight": 100.0}],
+                      correct_comments="", incorrect_comments=None, neutral_comments="")
+        fields.update(overrides)
+        return MagicMock(**fields)
+
+    def test_identical_question_is_not_edited(self, tmp_path, monkeypatch):
+        remote = self._remote()
+        quiz = self._sync(tmp_path, monkeypatch, remote)
+        remote.edit.assert_not_called()
+        remote.delete.assert_not_called()
+        quiz.create_question.assert_not_called()
+
+    def test_changed_points_are_edited(self, tmp_path, monkeypatch):
+        remote = self._remote(points_possible=2.0)
+        self._sync(tmp_path, monkeypatch, remote)
+        remote.edit.assert_called_once()
+
+    def test_question_with_synced_hash_is_not_compared(self, tmp_path, monkeypatch):
+        # Differs on Canvas, but this exact question was synced before
+        remote = self._remote(points_possible=2.0)
+        self._sync(tmp_path, monkeypatch, remote, question_hashes=_question_hashes(self.QUESTIONS, _config(tmp_path)))
+        remote.edit.assert_not_called()
+
+    def test_changed_feedback_is_edited(self, tmp_path, monkeypatch):
+        remote = self._remote(correct_comments="Well done")
+        self._sync(tmp_path, monkeypatch, remote)
+        remote.edit.assert_called_once()
+
+    def test_question_edited_since_last_sync_is_sent(self, tmp_path, monkeypatch):
+        """Feedback-only edit: Canvas still matches every compared field, the hash does not."""
+        synced = [dict(self.QUESTIONS[0], incorrect_comments="Try again")]
+        remote = self._remote()
+        self._sync(tmp_path, monkeypatch, remote, question_hashes=_question_hashes(synced, _config(tmp_path)))
+        remote.edit.assert_called_once()
+
+    def test_question_hashes_are_stored(self, tmp_path, monkeypatch):
+        self._sync(tmp_path, monkeypatch, self._remote())
+        _, entry = get_mapped_id(str(tmp_path), str(tmp_path / "01_Quiz.json"))
+        assert entry["question_hashes"] == {"Q1": _questions_hash(self.QUESTIONS[0], _config(tmp_path))}
+
+
+class TestJsonAssetScan:
+
+    def test_file_text_is_scanned_for_assets(self, tmp_path, monkeypatch):
+        seen = []
+        monkeypatch.setattr(quiz_handler, "process_content", lambda content, *a, **k: seen.append(content) or content)
+        monkeypatch.setattr(QuizHandler, "_render_qmd_questions", lambda self, q, *a, **k: (q, True))
+        path = _json_quiz(tmp_path, [{"question_name": "Q1", "question_text": '<img src="fig.png">', "answers": []}])
+        course = MagicMock()
+        course.get_quiz.return_value.id = 5
+        course.get_quiz.return_value.get_questions.return_value = []
+        save_mapped_id(str(tmp_path), path, 5, mtime=0)
+
+        QuizHandler().sync(path, course, canvas_obj=MagicMock(), content_root=str(tmp_path))
+
+        with open(path, encoding="utf-8") as f:
+            assert seen[0] == f.read()
+
+
+class TestQuestionHashes:
+
+    def test_duplicate_names_are_left_out(self):
+        questions = [{"question_name": "A"}, {"question_name": "B"}, {"question_name": "A", "x": 1}]
+        assert set(_question_hashes(questions)) == {"B"}
+
+
+class TestFilesFingerprint:
+
+    def test_swapped_mtimes_change_fingerprint(self, tmp_path):
+        quiz, desc = tmp_path / "quiz.json", tmp_path / "desc.qmd"
+        quiz.write_text("{}")
+        desc.write_text("x")
+        os.utime(quiz, ns=(1_000, 1_000))
+        os.utime(desc, ns=(2_000, 2_000))
+        before = _files_fingerprint((str(quiz), str(desc)))
+        os.utime(quiz, ns=(2_000, 2_000))
+        os.utime(desc, ns=(1_000, 1_000))
+        assert _files_fingerprint((str(quiz), str(desc))) != before
+
+    def test_size_change_is_detected(self, tmp_path):
+        quiz = tmp_path / "quiz.json"
+        quiz.write_text("{}")
+        os.utime(quiz, ns=(1_000, 1_000))
+        before = _files_fingerprint((str(quiz), None))
+        quiz.write_text("{ }")
+        os.utime(quiz, ns=(1_000, 1_000))
+        assert _files_fingerprint((str(quiz), None)) != before
+
+    def test_missing_file_is_stable(self, tmp_path):
+        paths = (str(tmp_path / "quiz.json"), str(tmp_path / "missing.qmd"))
+        assert _files_fingerprint(paths) == _files_fingerprint(paths)
+
+    def test_unchanged_quiz_skips_update(self, tmp_path, monkeypatch):
+        _stub_rendering(monkeypatch)
+        path = _json_quiz(tmp_path, [])
+        course = MagicMock()
+        course.get_quizzes.return_value = []
+        quiz = course.create_quiz.return_value
+        quiz.id = 5
+        quiz.get_questions.return_value = []
+        QuizHandler().sync(path, course, canvas_obj=MagicMock(), content_root=str(tmp_path))
+        course.get_quiz.return_value = quiz
+
+        QuizHandler().sync(path, course, canvas_obj=MagicMock(), content_root=str(tmp_path))
+
+        course.get_quiz.assert_called_once_with(5)
+        assert quiz.edit.call_count == 1  # only the first sync's final save
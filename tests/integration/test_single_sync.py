@@ -10,7 +10,7 @@ from types import SimpleNamespace
 from unittest.mock import MagicMock
 
 import handlers.single_sync as single_sync
-from handlers.single_sync import sync_single_file
+from handlers.single_sync import find_or_create_module, sync_single_file
 
 
 def _make_course(module):
@@ -164,3 +164,40 @@ class TestSyncSingleFileValidation:
         assert result.success
         assert result.position is None
         course.create_module.assert_not_called()
+
+
+class TestFindOrCreateModule:
+
+    def _course(self, names):
+        course = MagicMock()
+        course.id = 7
+        course.get_modules.side_effect = lambda search_term=None, **kw: [
+            SimpleNamespace(name=n, id=i) for i, n in enumerate(names) if search_term in (None, n)]
+        course.create_module.side_effect = lambda module: SimpleNamespace(id=99, **module)
+        return course
+
+    def test_lists_modules_once_for_many_lookups(self):
+        course = self._course(["Intro", "Statics"])
+        assert find_or_create_module(course, "Intro").name == "Intro"
+        assert find_or_create_module(course, "Statics").name == "Statics"
+        assert course.get_modules.call_count == 1
+        course.create_module.assert_not_called()
+
+    def test_created_module_is_remembered(self):
+        course = self._course([])
+        created = find_or_create_module(course, "New")
+        assert find_or_create_module(course, "New") is created
+        course.create_module.assert_called_once_with(module={"name": "New"})
+        # One listing plus one search before creating
+        assert course.get_modules.call_count == 2
+
+    def test_each_single_sync_relists_modules(self, tmp_path):
+        """A module deleted in Canvas between two calls is not found from a stale index."""
+        mod_dir = _make_module_dir(tmp_path, ["01_A.qmd"])
+        course = _make_course(None)
+        course.get_modules.return_value = [_make_module(present_titles=["A"])]
+        mod_item = MagicMock(title="A", position=1)
+        for _ in range(2):
+            sync_single_file(course, str(tmp_path), str(mod_dir / "01_A.qmd"),
+                             handlers=[_FakeHandler("01_A.qmd", mod_item)])
+        assert course.get_modules.call_count == 2
@@ -0,0 +1,19 @@
+"""Tests that each handler's title index lists its own kind of Canvas object."""
+
+import pytest
+
+from handlers.page_handler import PageHandler
+from handlers.quiz_handler import QuizHandler
+from handlers.single_sync import MODULE_INDEX
+
+
+@pytest.mark.parametrize("index, kind, title_attr", [
+    (PageHandler._page_index, "pages", "title"),
+    (QuizHandler._quiz_index, "quizzes", "title"),
+    (MODULE_INDEX, "modules", "name"),
+])
+def test_index_lists_its_kind(make_listed_course, index, kind, title_attr):
+    course = make_listed_course(kind, ["Listed"], searchable=["Late"], title_attr=title_attr)
+    assert getattr(index.find(course, "Listed"), title_attr) == "Listed"
+    assert getattr(index.find(course, "Late"), title_attr) == "Late"
+    assert getattr(course, f"get_{kind}").call_count == 2
@@ -2,6 +2,15 @@
 
 import os
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from canvasapi.exceptions import Forbidden, RateLimitExceeded
+
+import handlers.content_utils as content_utils
 from handlers.content_utils import (
     parse_module_name,
     clean_title,
@@ -11,6 +20,12 @@ from handlers.content_utils import (
     save_mapped_id,
     safe_delete_file,
     safe_delete_dir,
+    frontmatter_may_contain,
+    SyncMap,
+    canvas_retry,
+    load_frontmatter_metadata,
+    content_lock,
+    TitleIndex,
 )
 
 
@@ -66,6 +81,31 @@ class TestCleanTitle:
         assert clean_title("02_Intro.qmd") == "Intro.qmd"
 
 
+# --- frontmatter_may_contain ---
+
+class TestFrontmatterMayContain:
+
+    def test_needle_in_frontmatter(self, tmp_path):
+        f = tmp_path / "a.qmd"
+        f.write_text("---\ncanvas:\n  type: page\n---\nBody", encoding="utf-8")
+        assert frontmatter_may_contain(str(f), b"page") is True
+
+    def test_needle_only_in_body(self, tmp_path):
+        f = tmp_path / "a.qmd"
+        f.write_text("---\ntitle: X\n---\nThis page talks about pages", encoding="utf-8")
+        assert frontmatter_may_contain(str(f), b"page") is False
+
+    def test_no_frontmatter_defers_to_parser(self, tmp_path):
+        f = tmp_path / "a.qmd"
+        f.write_text("Just a body", encoding="utf-8")
+        assert frontmatter_may_contain(str(f), b"page") is True
+
+    def test_frontmatter_longer_than_head_defers(self, tmp_path):
+        f = tmp_path / "a.qmd"
+        f.write_text("---\n" + "x: 1\n" * 1000 + "---\n", encoding="utf-8")
+        assert frontmatter_may_contain(str(f), b"page") is True
+
+
 # --- Sync map I/O ---
 
 class TestSyncMap:
@@ -98,6 +138,18 @@ class TestSyncMap:
         loaded = load_sync_map(str(tmp_path))
         assert loaded == {"new": 2}
 
+    def test_orjson_and_stdlib_write_the_same_file(self, tmp_path, monkeypatch):
+        data = {"b/ö.qmd": {"id": 2, "mtime": 1712345678.123456}, "a.qmd": {"id": 1, "mtime": 0.5}}
+        save_sync_map(str(tmp_path), data)
+        path = os.path.join(str(tmp_path), ".canvas_sync_map.json")
+        with open(path, "rb") as f:
+            written = f.read()
+        monkeypatch.setattr(content_utils, "orjson", None)
+        save_sync_map(str(tmp_path), data)
+        with open(path, "rb") as f:
+            assert f.read() == written
+        assert list(json.loads(written)) == ["a.qmd", "b/ö.qmd"]
+
 
 # --- get_mapped_id / save_mapped_id ---
 
@@ -134,6 +186,11 @@ class TestMappedId:
         assert sync_map["file.qmd"]["id"] == 42
         assert sync_map["file.qmd"]["mtime"] == 1.5
 
+    def test_save_extra_fields(self, tmp_path):
+        file_path = os.path.join(str(tmp_path), "quiz.json")
+        save_mapped_id(str(tmp_path), file_path, 7, mtime=2.0, questions_hash="abc")
+        assert load_sync_map(str(tmp_path))["quiz.json"] == {"id": 7, "mtime": 2.0, "questions_hash": "abc"}
+
     def test_save_without_mtime_legacy(self, tmp_path):
         file_path = os.path.join(str(tmp_path), "file.qmd")
         save_mapped_id(str(tmp_path), file_path, 99)
@@ -141,6 +198,140 @@ class TestMappedId:
         assert sync_map["file.qmd"] == 99
 
 
+
+# --- SyncMap (batched writes) ---
+
+class TestSyncMapBatch:
+
+    def _map_path(self, tmp_path):
+        return os.path.join(str(tmp_path), ".canvas_sync_map.json")
+
+    def test_writes_once_on_exit(self, tmp_path):
+        root = str(tmp_path)
+        with SyncMap(root):
+            for i in range(3):
+                save_mapped_id(root, os.path.join(root, f"{i}.qmd"), i, mtime=1.0)
+            assert not os.path.exists(self._map_path(tmp_path))
+        with open(self._map_path(tmp_path), encoding="utf-8") as f:
+            data = json.load(f)
+        assert [data[f"{i}.qmd"]["id"] for i in range(3)] == [0, 1, 2]
+
+    def test_reads_see_pending_updates(self, tmp_path):
+        root = str(tmp_path)
+        file_path = os.path.join(root, "file.qmd")
+        with SyncMap(root):
+            save_mapped_id(root, file_path, 42, mtime=2.0)
+            assert get_mapped_id(root, file_path)[0] == 42
+            sync_map = load_sync_map(root)
+            sync_map["file.qmd"]["extra"] = "x"
+            save_sync_map(root, sync_map)
+        assert load_sync_map(root)["file.qmd"] == {"id": 42, "mtime": 2.0, "extra": "x"}
+
+    def test_loads_existing_entries(self, tmp_path):
+        root = str(tmp_path)
+        save_sync_map(root, {"old.qmd": 7})
+        with SyncMap(root) as sync_map:
+            assert sync_map.get(os.path.join(root, "old.qmd")) == 7
+            sync_map.set(os.path.join(root, "new.qmd"), 8)
+        assert load_sync_map(root) == {"old.qmd": 7, "new.qmd": 8}
+
+    def test_nested_block_joins_outer(self, tmp_path):
+        root = str(tmp_path)
+        with SyncMap(root) as outer:
+            with SyncMap(root) as inner:
+                assert inner is outer
+                save_mapped_id(root, os.path.join(root, "a.qmd"), 1)
+            assert not os.path.exists(self._map_path(tmp_path))
+        assert load_sync_map(root) == {"a.qmd": 1}
+
+    def test_flushes_on_error(self, tmp_path):
+        root = str(tmp_path)
+        try:
+            with SyncMap(root):
+                save_mapped_id(root, os.path.join(root, "a.qmd"), 1)
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        assert load_sync_map(root) == {"a.qmd": 1}
+
+    def test_no_write_when_unchanged(self, tmp_path):
+        with SyncMap(str(tmp_path)):
+            pass
+        assert not os.path.exists(self._map_path(tmp_path))
+
+    def test_save_leaves_no_temp_files(self, tmp_path):
+        save_sync_map(str(tmp_path), {"a": 1})
+        assert os.listdir(str(tmp_path)) == [".canvas_sync_map.json"]
+
+# --- load_frontmatter_metadata ---
+
+class TestLoadFrontmatterMetadata:
+
+    def test_parses_once_per_file_version(self, tmp_path, monkeypatch):
+        path = tmp_path / "01_A.qmd"
+        path.write_text("---\ncanvas:\n  type: page\n---\nBody\n", encoding="utf-8")
+        loads = []
+        real_load = content_utils.frontmatter.load
+        monkeypatch.setattr(content_utils.frontmatter, "load", lambda p: loads.append(p) or real_load(p))
+
+        for _ in range(3):
+            assert load_frontmatter_metadata(str(path)) == {"canvas": {"type": "page"}}
+        assert len(loads) == 1
+
+        path.write_text("---\ncanvas:\n  type: assignment\n---\nBody\n", encoding="utf-8")
+        assert load_frontmatter_metadata(str(path))["canvas"]["type"] == "assignment"
+        assert len(loads) == 2
+
+    def test_unreadable_frontmatter_is_empty(self, tmp_path):
+        bad = tmp_path / "bad.qmd"
+        bad.write_text("---\ncanvas: [unclosed\n---\n", encoding="utf-8")
+        assert load_frontmatter_metadata(str(bad)) == {}
+        assert load_frontmatter_metadata(str(tmp_path / "missing.qmd")) == {}
+
+
+# --- canvas_retry ---
+
+class TestCanvasRetry:
+
+    def test_retries_rate_limited_calls(self, monkeypatch):
+        sleeps = []
+        monkeypatch.setattr(content_utils.time, "sleep", sleeps.append)
+        calls = []
+
+        def flaky(x):
+            calls.append(x)
+            if len(calls) < 3:
+                raise RateLimitExceeded("429")
+            return x * 2
+
+        assert canvas_retry(flaky, 21) == 42
+        assert sleeps == [1.0, 2.0]
+
+    def test_gives_up_after_retries(self, monkeypatch):
+        monkeypatch.setattr(content_utils.time, "sleep", lambda s: None)
+        limited = MagicMock(side_effect=RateLimitExceeded("429"))
+        with pytest.raises(RateLimitExceeded):
+            canvas_retry(limited, retries=2)
+        assert limited.call_count == 2
+
+    def test_retries_canvas_403_throttling(self, monkeypatch):
+        monkeypatch.setattr(content_utils.time, "sleep", lambda s: None)
+        throttled = MagicMock(side_effect=[Forbidden("403 Forbidden (Rate Limit Exceeded)\n"), "ok"])
+        assert canvas_retry(throttled) == "ok"
+
+    def test_plain_403_is_not_retried(self):
+        denied = MagicMock(side_effect=Forbidden("user not authorized to perform that action"))
+        with pytest.raises(Forbidden):
+            canvas_retry(denied)
+        assert denied.call_count == 1
+
+    def test_other_errors_propagate_immediately(self):
+        broken = MagicMock(side_effect=ValueError("bad"))
+        with pytest.raises(ValueError):
+            canvas_retry(broken)
+        assert broken.call_count == 1
+
+
 # --- safe_delete_file / safe_delete_dir ---
 
 class TestSafeDelete:
@@ -163,3 +354,82 @@ class TestSafeDelete:
 
     def test_delete_nonexistent_dir_no_error(self, tmp_path):
         safe_delete_dir(str(tmp_path / "nope"))
+
+
+# --- content_lock ---
+
+class TestContentLock:
+
+    def test_relative_and_absolute_paths_share_a_lock(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        assert content_lock("01_Mod/02_Page.qmd") is content_lock(str(tmp_path / "01_Mod" / "02_Page.qmd"))
+
+    def test_other_files_have_their_own_lock(self, tmp_path):
+        assert content_lock(str(tmp_path / "a.qmd")) is not content_lock(str(tmp_path / "b.qmd"))
+
+
+# --- TitleIndex ---
+
+def _page_index():
+    return TitleIndex(lambda course, **params: course.get_pages(**params))
+
+
+class TestTitleIndex:
+
+    def test_lists_once_for_many_lookups(self, make_listed_course):
+        course = make_listed_course("pages", ["Welcome", "Syllabus", "Resources"])
+        index = _page_index()
+        for title in ("Welcome", "Syllabus", "Resources"):
+            assert index.find(course, title).title == title
+        assert course.get_pages.call_count == 1
+
+    def test_miss_falls_back_to_title_search(self, make_listed_course):
+        """Objects created after the listing (JIT stubs) are still found."""
+        course = make_listed_course("pages", ["Welcome"], searchable=["Late Stub"])
+        index = _page_index()
+        index.find(course, "Welcome")
+        assert index.find(course, "Late Stub").title == "Late Stub"
+        # Found objects are cached, so a repeat lookup needs no further request
+        index.find(course, "Late Stub")
+        assert course.get_pages.call_count == 2
+
+    def test_returns_none_when_missing(self, make_listed_course):
+        course = make_listed_course("pages", ["Welcome"])
+        assert _page_index().find(course, "Missing") is None
+
+    def test_remembered_object_is_found_without_request(self, make_listed_course):
+        course = make_listed_course("pages", [])
+        index = _page_index()
+        index.find(course, "Anything")
+        calls = course.get_pages.call_count
+        index.remember(course, SimpleNamespace(title="New Page"))
+        assert index.find(course, "New Page").title == "New Page"
+        assert course.get_pages.call_count == calls
+
+    def test_title_attr(self, make_listed_course):
+        course = make_listed_course("modules", ["Intro"], title_attr="name")
+        index = TitleIndex(lambda course, **params: course.get_modules(**params), title_attr="name")
+        assert index.find(course, "Intro").name == "Intro"
+
+    def test_clear_relists(self, make_listed_course):
+        course = make_listed_course("pages", ["Welcome"])
+        index = _page_index()
+        index.find(course, "Welcome")
+        index.clear()
+        index.find(course, "Welcome")
+        assert course.get_pages.call_count == 2
+
+    def test_concurrent_lookups_share_one_listing(self, make_listed_course):
+        course = make_listed_course("pages", ["A", "B", "C", "D"])
+        listing = course.get_pages.side_effect
+
+        def slow_get_pages(*args, **kwargs):
+            time.sleep(0.01)
+            return listing(*args, **kwargs)
+
+        course.get_pages.side_effect = slow_get_pages
+        index = _page_index()
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            found = list(pool.map(lambda t: index.find(course, t), "ABCD"))
+        assert [p.title for p in found] == list("ABCD")
+        assert course.get_pages.call_count == 1
@@ -2,6 +2,10 @@
 
 import os
 import json
+from unittest.mock import MagicMock
+
+import handlers.content_utils as content_utils
+import handlers.subheader_handler as subheader_handler
 from handlers.page_handler import PageHandler
 from handlers.assignment_handler import AssignmentHandler
 from handlers.quiz_handler import QuizHandler
@@ -43,6 +47,12 @@ class TestPageHandler:
         path = _write(tmp_path, "01_Bare.qmd", "---\ntitle: Test\n---\nBody")
         assert PageHandler().can_handle(path) is False
 
+    def test_accepts_page_with_long_frontmatter(self, tmp_path):
+        """Frontmatter longer than the pre-check head still gets a full parse."""
+        padding = "".join(f"k{i}: value\n" for i in range(400))
+        path = _write(tmp_path, "01_Long.qmd", f"---\n{padding}canvas:\n  type: page\n---\nBody")
+        assert PageHandler().can_handle(path) is True
+
 
 # --- AssignmentHandler ---
 
@@ -76,6 +86,21 @@ class TestQuizHandler:
         path = _write(tmp_path, "data.json", json.dumps(data))
         assert QuizHandler().can_handle(path) is False
 
+    def test_json_questions_after_large_canvas_block(self, tmp_path):
+        """Format not decidable from the first bytes still gets a full parse."""
+        data = {"canvas": {"description": "x" * 2000}, "questions": []}
+        path = _write(tmp_path, "quiz.json", json.dumps(data))
+        assert QuizHandler().can_handle(path) is True
+
+    def test_json_nested_questions_key_rejected(self, tmp_path):
+        data = {"meta": {"questions": []}}
+        path = _write(tmp_path, "data.json", json.dumps(data))
+        assert QuizHandler().can_handle(path) is False
+
+    def test_non_json_content_rejected(self, tmp_path):
+        path = _write(tmp_path, "notes.json", "questions: not json")
+        assert QuizHandler().can_handle(path) is False
+
     def test_qmd_frontmatter_type(self, tmp_path):
         path = _write(tmp_path, "quiz.qmd", "---\ncanvas:\n  type: quiz\n---\n")
         assert QuizHandler().can_handle(path) is True
@@ -90,6 +115,42 @@ class TestQuizHandler:
         path = _write(tmp_path, "page.qmd", "---\ncanvas:\n  type: page\n---\nNo quiz here")
         assert QuizHandler().can_handle(path) is False
 
+    def test_qmd_reuses_shared_frontmatter_parse(self, tmp_path, monkeypatch):
+        """The verdict comes from the frontmatter parse earlier handlers share."""
+        path = _write(tmp_path, "quiz.qmd", "---\ncanvas:\n  type: quiz\n---\n")
+        content_utils.load_frontmatter_metadata(path)
+        monkeypatch.setattr(content_utils.frontmatter, "load", MagicMock(side_effect=AssertionError))
+        assert QuizHandler().can_handle(path) is True
+
+
+class TestQuizParseCache:
+
+    def test_accepted_file_is_handed_to_sync(self, tmp_path):
+        data = {"canvas": {"description": "x" * 2000}, "questions": []}
+        path = _write(tmp_path, "quiz.json", json.dumps(data))
+        assert QuizHandler().can_handle(path) is True
+        text, parsed = QuizHandler._take_cached(path)
+        assert parsed == data
+        # Taken once; a second sync would read the file itself
+        assert QuizHandler._take_cached(path) is None
+
+    def test_qmd_text_is_cached(self, tmp_path):
+        content = "---\ncanvas:\n  type: quiz\n---\n"
+        path = _write(tmp_path, "quiz.qmd", content)
+        assert QuizHandler().can_handle(path) is True
+        assert QuizHandler._take_cached(path) == (content, None)
+
+    def test_changed_file_is_not_served_from_cache(self, tmp_path):
+        path = _write(tmp_path, "quiz.qmd", "---\ncanvas:\n  type: quiz\n---\n")
+        QuizHandler().can_handle(path)
+        os.utime(path, ns=(0, 0))
+        assert QuizHandler._take_cached(path) is None
+
+    def test_rejected_file_is_not_cached(self, tmp_path):
+        path = _write(tmp_path, "page.qmd", "---\ncanvas:\n  type: page\n---\n")
+        QuizHandler().can_handle(path)
+        assert QuizHandler._take_cached(path) is None
+
 
 # --- NewQuizHandler ---
 
@@ -130,6 +191,12 @@ class TestSubHeaderHandler:
         path = _write(tmp_path, "page.qmd", "---\ncanvas:\n  type: page\n---\n")
         assert SubHeaderHandler().can_handle(path) is False
 
+    def test_md_without_subheader_is_not_parsed(self, tmp_path, monkeypatch):
+        path = _write(tmp_path, "notes.md", "---\ntitle: Notes\n---\n# Notes\n")
+        monkeypatch.setattr(subheader_handler, "load_frontmatter_metadata", MagicMock())
+        assert SubHeaderHandler().can_handle(path) is False
+        subheader_handler.load_frontmatter_metadata.assert_not_called()
+
 
 # --- ExternalLinkHandler ---
 
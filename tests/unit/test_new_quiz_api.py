@@ -0,0 +1,27 @@
+"""Unit tests for NewQuizAPIClient request plumbing (no network)."""
+
+from unittest.mock import MagicMock
+
+from handlers.new_quiz_api import NewQuizAPIClient
+
+
+class TestSharedSession:
+
+    def test_clients_share_one_session(self):
+        a = NewQuizAPIClient("https://canvas.example.com/", "tok-a")
+        b = NewQuizAPIClient("https://canvas.example.com", "tok-b")
+        assert a.session is b.session
+
+    def test_requests_go_through_session(self, monkeypatch):
+        client = NewQuizAPIClient("https://canvas.example.com/", "tok")
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"id": 7}
+        session = MagicMock()
+        session.request.return_value = response
+        monkeypatch.setattr(client, "session", session)
+
+        assert client.get_quiz(1, 2) == {"id": 7}
+        method, url = session.request.call_args[0]
+        assert method == "GET"
+        assert url == "https://canvas.example.com/api/quiz/v1/courses/1/quizzes/2"
+        assert session.request.call_args[1]["headers"]["Authorization"] == "Bearer tok"
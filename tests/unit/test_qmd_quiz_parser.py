@@ -6,6 +6,9 @@ from handlers.qmd_quiz_parser import (
     _parse_attributes,
     _strip_indent,
     _clean_question_text,
+    _extract_named_divs,
+    _scan_blocks,
+    _remove_comment_divs,
 )
 
 
@@ -67,6 +70,24 @@ class TestParseAttributes:
         attrs = _parse_attributes('name="Spänning"')
         assert attrs["name"] == "Spänning"
 
+    def test_negative_and_exponent_numbers(self):
+        attrs = _parse_attributes("margin=-2 tolerance=1e-3 offset=-.5")
+        assert attrs == {"margin": -2, "tolerance": 0.001, "offset": -0.5}
+
+    def test_number_words_stay_strings(self):
+        attrs = _parse_attributes("a=nan b=inf c=1.2.3")
+        assert attrs == {"a": "nan", "b": "inf", "c": "1.2.3"}
+
+    def test_correct_class_shorthand(self):
+        assert _parse_attributes('.correct comment="Yes"') == {"correct": True, "comment": "Yes"}
+
+    def test_correct_inside_value_is_not_a_class(self):
+        attrs = _parse_attributes('comment="see .correct usage"')
+        assert "correct" not in attrs
+
+    def test_unclosed_quote_reads_to_whitespace(self):
+        assert _parse_attributes('name="abc def') == {"name": '"abc'}
+
 
 # --- Utility functions ---
 
@@ -89,6 +110,31 @@ class TestStripIndent:
         result = _strip_indent(text)
         assert result == "line1\n\nline2"
 
+    def test_whitespace_only_lines_ignored(self):
+        text = "    line1\n  \n    line2"
+        assert _strip_indent(text) == "line1\n\nline2"
+
+    def test_mixed_tabs_and_spaces_not_cut(self):
+        """A tab and four spaces share no common prefix, so nothing is removed."""
+        text = "\tline1\n    line2"
+        assert _strip_indent(text) == text
+
+
+class TestScanBlocks:
+
+    @staticmethod
+    def _opener(stripped):
+        return "open" if stripped == "::: box" else None
+
+    def test_nested_fence_kept_and_bare_fences_dropped(self):
+        lines = ["before", "::: box", "a", "::: {.x}", "b", ":::", "c", ":::", "after"]
+        blocks = _scan_blocks(lines, ":::", self._opener, lambda rest: rest.lstrip()[:1] == "{")
+        assert blocks == [("open", ["a", "::: {.x}", "b", "c"])]
+
+    def test_unclosed_block_runs_to_end(self):
+        blocks = _scan_blocks(["::: box", "a", "b"], ":::", self._opener, lambda rest: False)
+        assert blocks == [("open", ["a", "b"])]
+
 
 class TestCleanQuestionText:
 
@@ -173,6 +219,32 @@ Question?
         _, questions = parse_qmd_quiz(content)
         assert questions[0]["answers"][0]["answer_weight"] == 100
 
+    def test_last_answer_ends_at_fence(self):
+        content = """---
+canvas:
+  title: "Test"
+---
+
+:::: {.question name="Q1"}
+
+Question?
+
+- [ ] Wrong
+- [x] Right
+  - First note
+  - Second note
+::: {.notes}
+Not part of the answer
+:::
+
+::::
+"""
+        _, questions = parse_qmd_quiz(content)
+        answers = questions[0]["answers"]
+        assert [a["answer_text"] for a in answers] == ["Wrong", "Right"]
+        # The last sub-bullet is the answer comment
+        assert answers[1]["answer_comments"] == "Second note"
+
 
 # --- Full parse: div answers ---
 
@@ -260,6 +332,27 @@ Review section 2.
         assert q["correct_comments"] == "Well done!"
         assert q["incorrect_comments"] == "Review section 2."
 
+    def test_named_div_opener_forms(self):
+        lines = [
+            ":::: correct-comment", "four colons", "::::",
+            ":::correct-comment", "no space, not an opener", ":::",
+            "::: correct-comment extra", "different name", ":::",
+        ]
+        assert _extract_named_divs(lines, "correct-comment") == ["four colons"]
+
+    def test_named_div_nested_block(self):
+        content = "::: correct-comment\nSee:\n::: {.callout-tip}\nTip\n:::\nDone\n:::\nAfter"
+        [div] = _extract_named_divs(content, "correct-comment")
+        assert div.startswith("See:\n::: {.callout-tip}\nTip")
+        assert div.endswith("Done")
+
+    def test_remove_both_comment_kinds(self):
+        text = ("Question?\n::: correct-comment\nYes\n:::\n"
+                "::: incorrect-comment\nNo\n:::\nAfter")
+        result = _remove_comment_divs(text)
+        assert "Yes" not in result and "No" not in result
+        assert result.startswith("Question?") and result.endswith("After")
+
 
 # --- Formula question ---
 
@@ -0,0 +1,302 @@
+"""Unit tests for BaseHandler's Quarto subprocess helpers (no Quarto needed)."""
+
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import handlers.base_handler as base_handler
+from handlers.base_handler import BaseHandler
+
+
+class TestRunQuarto:
+
+    def test_discards_stdout_and_captures_stderr(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(base_handler.subprocess, "run", lambda cmd, **kw: calls.append((cmd, kw)))
+        BaseHandler._run_quarto("doc.qmd", "html")
+        cmd, kw = calls[0]
+        assert cmd == ["quarto", "render", "doc.qmd", "--to", "html"]
+        assert kw["stdout"] is subprocess.DEVNULL
+        assert kw["stderr"] is subprocess.PIPE
+        assert kw["check"] is True
+
+
+class TestRenderError:
+
+    def test_uses_stderr_of_failed_render(self):
+        err = subprocess.CalledProcessError(1, ["quarto"], stderr=b"ERROR: bad yaml\n")
+        assert BaseHandler._render_error(err) == "ERROR: bad yaml"
+
+    def test_long_stderr_is_cut_to_its_tail(self):
+        stderr = b"progress\n" * 2000 + b"ERROR: bad yaml\n"
+        err = subprocess.CalledProcessError(1, ["quarto"], stderr=stderr)
+        message = BaseHandler._render_error(err)
+        assert message.startswith("...")
+        assert message.endswith("ERROR: bad yaml")
+        assert len(message) <= base_handler.RENDER_ERROR_TAIL_BYTES + 3
+
+    def test_falls_back_to_exception(self):
+        err = FileNotFoundError("quarto")
+        assert BaseHandler._render_error(err) is err
+        assert BaseHandler._render_error(subprocess.CalledProcessError(1, ["quarto"])).returncode == 1
+
+
+class TestTempRenderPaths:
+
+    def test_paths_share_stem(self, tmp_path):
+        qmd, html, files_dir = BaseHandler._temp_render_paths(str(tmp_path), "tmp-html-01_Intro")
+        assert qmd == str(tmp_path / "tmp-html-01_Intro.qmd")
+        assert html == str(tmp_path / "tmp-html-01_Intro.html")
+        assert files_dir == str(tmp_path / "tmp-html-01_Intro_files")
+
+    def test_qmd_in_directory_name_is_untouched(self, tmp_path):
+        base = tmp_path / "notes.qmd.d"
+        _, html, _ = BaseHandler._temp_render_paths(str(base), "tmp-html-page")
+        assert html == str(base / "tmp-html-page.html")
+
+
+class _Page(BaseHandler):
+    def can_handle(self, file_path):
+        return False
+
+    def sync(self, file_path, course, module=None, canvas_obj=None, content_root=None):
+        return None
+
+
+class TestBackgroundCleanup:
+
+    def test_render_removes_temp_files(self, tmp_path, monkeypatch):
+        def fake_quarto(qmd_path, to):
+            html_path = qmd_path[:-4] + ".html"
+            with open(html_path, "w", encoding="utf-8") as f:
+                f.write('<main id="quarto-document-content"><p>Hi</p></main>')
+            (tmp_path / "tmp-html-01_Page_files").mkdir()
+
+        monkeypatch.setattr(BaseHandler, "_run_quarto", staticmethod(fake_quarto))
+        pool = ThreadPoolExecutor(max_workers=1)
+        monkeypatch.setattr(base_handler, "_CLEANUP_POOL", pool)
+        body = _Page().render_quarto_document("# Hi", str(tmp_path), "01_Page.qmd")
+        assert "<p>Hi</p>" in body
+
+        pool.shutdown(wait=True)
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestRenderCache:
+
+    def _fake_quarto(self, monkeypatch, calls):
+        def fake_quarto(qmd_path, to):
+            calls.append(qmd_path)
+            with open(qmd_path[:-4] + ".html", "w", encoding="utf-8") as f:
+                f.write('<main id="quarto-document-content"><p>Hi</p></main>')
+        monkeypatch.setattr(BaseHandler, "_run_quarto", staticmethod(fake_quarto))
+
+    def test_unchanged_document_renders_once(self, tmp_path, monkeypatch):
+        calls = []
+        self._fake_quarto(monkeypatch, calls)
+        page = _Page()
+        first = page._render_chunk_document("doc", str(tmp_path), content_root=str(tmp_path))
+        second = page._render_chunk_document("doc", str(tmp_path), content_root=str(tmp_path))
+        assert first == second == "<p>Hi</p>"
+        assert len(calls) == 1
+        page._render_chunk_document("changed", str(tmp_path), content_root=str(tmp_path))
+        assert len(calls) == 2
+
+    def test_no_cache_without_content_root(self, tmp_path, monkeypatch):
+        calls = []
+        self._fake_quarto(monkeypatch, calls)
+        _Page()._render_chunk_document("doc", str(tmp_path))
+        _Page()._render_chunk_document("doc", str(tmp_path))
+        assert len(calls) == 2
+        assert not (tmp_path / base_handler.RENDER_CACHE_DIR).exists()
+
+    def test_prunes_least_recently_used(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(base_handler, "RENDER_CACHE_MAX_ENTRIES", 2)
+        self._fake_quarto(monkeypatch, [])
+        page = _Page()
+        for doc in ("a", "b", "c"):
+            page._render_chunk_document(doc, str(tmp_path), content_root=str(tmp_path))
+        assert len(list((tmp_path / base_handler.RENDER_CACHE_DIR).iterdir())) == 2
+
+    def test_document_render_cached_only_when_asked(self, tmp_path, monkeypatch):
+        calls = []
+        self._fake_quarto(monkeypatch, calls)
+        page = _Page()
+        for _ in range(2):
+            assert page.render_quarto_document("doc", str(tmp_path), "desc_a.qmd",
+                                               content_root=str(tmp_path), cache=True) == "<p>Hi</p>"
+        assert len(calls) == 1
+        page.render_quarto_document("doc", str(tmp_path), "01_Page.qmd", content_root=str(tmp_path))
+        assert len(calls) == 2
+
+    def test_project_config_edit_renders_again(self, tmp_path, monkeypatch):
+        calls = []
+        self._fake_quarto(monkeypatch, calls)
+        (tmp_path / "01_Mod").mkdir()
+        base_path = str(tmp_path / "01_Mod")
+        (tmp_path / "_quarto.yml").write_text("format:\n  html:\n    css: styles.css\n", encoding="utf-8")
+        (tmp_path / "styles.css").write_text("p { color: red; }", encoding="utf-8")
+        page = _Page()
+
+        page._render_chunk_document("doc", base_path, content_root=str(tmp_path))
+        page._render_chunk_document("doc", base_path, content_root=str(tmp_path))
+        assert len(calls) == 1
+
+        (tmp_path / "_quarto.yml").write_text("format:\n  html:\n    css: styles.css\n    toc: true\n", encoding="utf-8")
+        page._render_chunk_document("doc", base_path, content_root=str(tmp_path))
+        assert len(calls) == 2
+
+        (tmp_path / "styles.css").write_text("p { color: blue; font-weight: bold; }", encoding="utf-8")
+        page._render_chunk_document("doc", base_path, content_root=str(tmp_path))
+        assert len(calls) == 3
+
+    def test_quarto_upgrade_renders_again(self, tmp_path, monkeypatch):
+        calls = []
+        self._fake_quarto(monkeypatch, calls)
+        page = _Page()
+        monkeypatch.setattr(base_handler, "_quarto_version", lambda: "1.4.550")
+        page._render_chunk_document("doc", str(tmp_path), content_root=str(tmp_path))
+        monkeypatch.setattr(base_handler, "_quarto_version", lambda: "1.5.57")
+        page._render_chunk_document("doc", str(tmp_path), content_root=str(tmp_path))
+        assert len(calls) == 2
+
+    def test_cached_document_renders_again_after_config_edit(self, tmp_path, monkeypatch):
+        """Quiz descriptions use cache=True; a _quarto.yml edit must still reach them."""
+        calls = []
+        self._fake_quarto(monkeypatch, calls)
+        page = _Page()
+        (tmp_path / "_quarto.yml").write_text("format: html\n", encoding="utf-8")
+        for _ in range(2):
+            page.render_quarto_document("doc", str(tmp_path), "desc_a.qmd", content_root=str(tmp_path), cache=True)
+        (tmp_path / "_quarto.yml").write_text("format:\n  html:\n    toc: true\n", encoding="utf-8")
+        page.render_quarto_document("doc", str(tmp_path), "desc_a.qmd", content_root=str(tmp_path), cache=True)
+        assert len(calls) == 2
+
+    def test_clear_render_cache(self, tmp_path, monkeypatch):
+        self._fake_quarto(monkeypatch, [])
+        _Page()._render_chunk_document("doc", str(tmp_path), content_root=str(tmp_path))
+        base_handler.clear_render_cache(str(tmp_path))
+        assert not (tmp_path / base_handler.RENDER_CACHE_DIR).exists()
+
+
+class TestNeedsRender:
+
+    def test_plain_block_html_is_left_alone(self):
+        assert not BaseHandler._needs_render("<p>What is 2 + 2?</p>")
+        assert not BaseHandler._needs_render(" <ul><li>One</li><li>Two</li></ul>\n")
+
+    def test_markdown_and_latex_are_rendered(self):
+        for text in ("What is *this*?", "<p>Solve $x^2$</p>", "<p>See [link](a.html)</p>",
+                     "<p>It's</p>", "<p>Wait...</p>", "<p>a -- b</p>", "<p>@ref</p>",
+                     "<p>one</p>\n\n<p>two</p>", "<b>inline</b>", "<p>unclosed"):
+            assert BaseHandler._needs_render(text), text
+
+
+class TestApplyRenderedChunks:
+
+    def test_replaces_rendered_pieces(self):
+        questions = [{"question_text": "*Q*", "answers": [{"answer_text": "A", "answer_weight": 100}],
+                      "correct_comments": "ok"}]
+        rendered = {"q0_text": "<em>Q</em>", "q0_a0": "<p>A</p>", "q0_correct_comments": "<p>ok</p>"}
+        [q] = BaseHandler._apply_rendered_chunks(questions, rendered)
+        assert q["question_text"] == "<em>Q</em>"
+        assert q["answers"] == [{"answer_html": "<p>A</p>", "answer_weight": 100}]
+        assert q["correct_comments"] == "<p>ok</p>"
+        # Inputs are left untouched
+        assert questions[0]["answers"][0] == {"answer_text": "A", "answer_weight": 100}
+
+    def test_unchanged_questions_are_not_copied(self):
+        q = {"question_text": "<p>Q</p>", "answers": [{"answer_html": "<p>A</p>"}]}
+        [out] = BaseHandler._apply_rendered_chunks([q], {"q0_text": "<p>Q</p>", "q0_a0": "<p>A</p>"})
+        assert out is q
+
+    def test_only_changed_answer_is_copied(self):
+        a0, a1 = {"answer_html": "same"}, {"answer_text": "x"}
+        [out] = BaseHandler._apply_rendered_chunks([{"answers": [a0, a1]}], {"q0_a0": "same", "q0_a1": "<p>x</p>"})
+        assert out["answers"][0] is a0
+        assert out["answers"][1] == {"answer_html": "<p>x</p>"}
+
+
+class TestStripTitleBlock:
+
+    def test_removes_title_header(self):
+        html = '<header id="title-block-header" class="quarto-title-block"><h1>T</h1></header><p>Body</p>'
+        assert BaseHandler._strip_title_block(html) == '<p>Body</p>'
+
+    def test_keeps_other_headers(self):
+        html = '<header class="site"><nav/></header><p>Body</p>'
+        assert BaseHandler._strip_title_block(html) == html
+
+    def test_other_header_before_title_block(self):
+        html = '<header class="a">x</header><header id="title-block-header"><h1>T</h1></header>end'
+        assert BaseHandler._strip_title_block(html) == '<header class="a">x</header>end'
+
+    def test_unclosed_header_left_alone(self):
+        html = '<header id="title-block-header"><h1>T</h1>' + '<p>x</p>' * 10000
+        assert BaseHandler._strip_title_block(html) == html
+
+    def test_matches_previous_regex(self):
+        html = ('<div><header data-x="1" id="title-block-header">\n<h1>A</h1>\n</header>'
+                '<p>Mid</p><header id="title-block-header">B</header></div>')
+        expected = re.sub(r'<header[^>]*id="title-block-header"[^>]*>.*?</header>', '', html, flags=re.DOTALL)
+        assert BaseHandler._strip_title_block(html) == expected
+
+
+class TestReadMainHtml:
+
+    def _page(self, tmp_path, html, newline="\n"):
+        path = tmp_path / "page.html"
+        path.write_bytes(html.replace("\n", newline).encode("utf-8"))
+        return str(path)
+
+    def test_returns_main_body(self, tmp_path):
+        html = '<html><main class="content" id="quarto-document-content">\n<p>Hé</p>\n</main></html>'
+        assert BaseHandler._read_main_html(self._page(tmp_path, html)) == '\n<p>Hé</p>\n'
+
+    def test_without_main_returns_page(self, tmp_path):
+        html = '<html><body><p>Hi</p></body></html>'
+        assert BaseHandler._read_main_html(self._page(tmp_path, html)) == html
+
+    def test_skips_other_main_and_unclosed_returns_page(self, tmp_path):
+        html = '<main id="other">x</main><main id="quarto-document-content"><p>Body</p></main>'
+        assert BaseHandler._read_main_html(self._page(tmp_path, html)) == '<p>Body</p>'
+        unclosed = '<main id="quarto-document-content"><p>Body</p>'
+        assert BaseHandler._read_main_html(self._page(tmp_path, unclosed)) == unclosed
+
+    def test_crlf_is_normalized(self, tmp_path):
+        html = '<main id="quarto-document-content">\n<p>A</p>\n</main>'
+        assert BaseHandler._read_main_html(self._page(tmp_path, html, "\r\n")) == '\n<p>A</p>\n'
+
+    def test_empty_file(self, tmp_path):
+        assert BaseHandler._read_main_html(self._page(tmp_path, "")) == ''
+
+    def test_matches_previous_regex(self, tmp_path):
+        html = ('<body><main data-a="1" id="quarto-document-content" class="c">\n<h1>A</h1>\n</main>'
+                '<main>tail</main></body>')
+        expected = re.search(r'<main[^>]*id="quarto-document-content"[^>]*>(.*?)</main>', html, re.DOTALL).group(1)
+        assert BaseHandler._read_main_html(self._page(tmp_path, html)) == expected
+
+
+class TestBuildChunkDocument:
+
+    def test_wraps_each_chunk_in_a_marker_div(self):
+        doc = BaseHandler._build_chunk_document(iter([("q0_text", "*Hi*"), ("q0_a0", "$x$")]))
+        assert doc == ('---\ntitle: ""\n---\n'
+                       '\n\n::: {#qchunk-q0_text}\n*Hi*\n:::\n'
+                       '\n\n::: {#qchunk-q0_a0}\n$x$\n:::\n')
+
+
+class TestSplitRenderedChunks:
+
+    def test_maps_each_marker(self):
+        html = ('<div id="qchunk-q0_text" class="x">\n<p>Q?</p>\n</div>'
+                '<div id="qchunk-q0_a0"><p>A</p></div>'
+                '<div id="qchunk-q0_correct_comments"> <p>Yes</p> </div>')
+        assert BaseHandler._split_rendered_chunks(html) == {
+            "q0_text": "<p>Q?</p>",
+            "q0_a0": "<p>A</p>",
+            "q0_correct_comments": "<p>Yes</p>",
+        }
+
+    def test_missing_marker_is_absent(self):
+        assert "q1_text" not in BaseHandler._split_rendered_chunks('<div id="qchunk-q0_text">x</div>')